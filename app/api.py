@@ -1,26 +1,57 @@
 """FastAPI endpoints"""
 
 from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import ipaddress
 import logging
 import os
+import time
 from dotenv import load_dotenv
 
 from .backend.droplet_manager import DropletManager
 from .backend.database_manager import DBManager
+from .backend.heartbeat_buffer import HeartbeatBuffer
+from .backend.logging_config import RequestLogSampler, configure_logging
+from .backend.metrics import HEARTBEATS, HTTP_REQUEST_DURATION, REGISTRY
+from .backend.pool_manager import PoolManager
+from .backend.reaper import StaleDropletReaper
+from .backend.reconciler import DropletReconciler
+from .backend.session_provisioner import SessionProvisioner
 from .backend.security import require_internal_hmac
 from .backend.constants import (
-    KEY_MESSAGE, KEY_SHARE_TAG, KEY_IP_ADDRESS,
-    ERROR_DROPLET_NOT_FOUND_DB, MSG_HEARTBEAT_UPDATED
+    KEY_MESSAGE, KEY_SHARE_TAG, KEY_IP_ADDRESS, KEY_STATE, KEY_ERROR,
+    KEY_DROPLET_IP, KEY_STATUS, KEY_RESULTS,
+    SESSION_STATE_PROVISIONING, SESSION_STATE_READY,
+    HEARTBEAT_STATUS_CREATED, HEARTBEAT_STATUS_UPDATED, HEARTBEAT_STATUS_INVALID,
+    ERROR_DROPLET_NOT_FOUND_DB, ERROR_SESSION_NOT_FOUND, ERROR_HEARTBEAT_BATCH_TOO_LARGE,
+    MSG_HEARTBEAT_UPDATED, MSG_HEARTBEAT_BATCH_PROCESSED, MSG_RECONCILE_COMPLETED
 )
 
 databaseManager = DBManager()
 dropletManager = DropletManager(databaseManager)
+poolManager = PoolManager(databaseManager, dropletManager)
+sessionProvisioner = SessionProvisioner(databaseManager, dropletManager)
+heartbeatBuffer = HeartbeatBuffer(databaseManager)
+reaper = StaleDropletReaper(databaseManager, dropletManager)
+reconciler = DropletReconciler(dropletManager)
+
+REGISTRY.callback_gauge(
+    "orchestrator_droplets",
+    "Droplets by state: fresh (idle), occupied, provisioning and stale (unhealthy).",
+    "state",
+    lambda: databaseManager.get_droplet_state_counts(),
+)
 
 load_dotenv()
 
+_HEARTBEAT_BATCH_MAX_ENTRIES = int(os.getenv("HEARTBEAT_BATCH_MAX_ENTRIES", "10000"))
+
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("app.requests")
+requestLogSampler = RequestLogSampler()
+_log_listener = None
 app = FastAPI(title="Game Orchestrator API")
 
 
@@ -52,19 +83,60 @@ def root():
     return {"status": "ok", "service": "orchestrator"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.on_event("startup")
 async def startup_event():
-    logger.info("[API DEBUG] Game Orchestrator API starting up...")
-    logger.info(f"[API DEBUG] CORS allowed origins: {cors_allowed_origins}")
-    logger.info(f"[API DEBUG] HMAC key configured: {bool(os.getenv('INTERNAL_HMAC_KEY'))}")
+    global _log_listener
+    _log_listener = configure_logging()
+    logger.info("Game Orchestrator API starting up")
+    logger.info("CORS allowed origins: %s", cors_allowed_origins)
+    logger.info("HMAC key configured: %s", bool(os.getenv("INTERNAL_HMAC_KEY")))
+    databaseManager.migrate()
+    databaseManager.load_index()
+    heartbeatBuffer.start()
+    poolManager.start()
+    reaper.start()
+    reconciler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await reconciler.stop()
+    await reaper.stop()
+    await poolManager.stop()
+    await sessionProvisioner.stop()
+    await dropletManager.close()
+    heartbeatBuffer.stop()
+    if _log_listener is not None:
+        _log_listener.stop()
 
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f"[REQUEST DEBUG] Incoming: {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
-    response = await call_next(request)
-    logger.info(f"[REQUEST DEBUG] Response: {request.method} {request.url.path} -> Status {response.status_code}")
-    return response
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        duration = time.perf_counter() - started
+        # Label by route template so /sessions/{share_tag}/status is one series
+        route_template = getattr(request.scope.get("route"), "path", None)
+        HTTP_REQUEST_DURATION.observe(duration, route_template or "unmatched", request.method, status_code)
+        route = route_template or request.url.path
+        if requestLogSampler.should_log(route, status_code):
+            request_logger.info("request", extra={
+                "method": request.method,
+                "path": request.url.path,
+                "route": route,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 2),
+            })
 
 
 class ServerHeartbeatRequest(BaseModel):
@@ -75,29 +147,42 @@ class ServerHeartbeatRequest(BaseModel):
 # WebGL Endpoints
 @app.post("/sessions/start")
 async def start_game_session_api():
-    free_session = databaseManager.get_droplets_without_player()
+    free_session = databaseManager.claim_free_droplet()
+    poolManager.request_refill()
     if free_session and free_session[0]:
         return {
             KEY_MESSAGE: "Reusing existing droplet",
             KEY_IP_ADDRESS: free_session[0],
-            KEY_SHARE_TAG: free_session[1]
+            KEY_SHARE_TAG: free_session[1],
+            KEY_STATE: SESSION_STATE_READY,
         }
-    
+
     try:
-        new_session = await dropletManager.create_droplet()
+        share_tag = sessionProvisioner.start_session()
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    new_share_tag = databaseManager.get_share_tag_by_ipv4(new_session)
-
-    if not new_share_tag:
-        raise HTTPException(status_code=500, detail="Droplet was created but share tag lookup failed.")
-
     return {
-        KEY_IP_ADDRESS: new_session,
-        KEY_SHARE_TAG: new_share_tag
+        KEY_MESSAGE: "Provisioning new droplet",
+        KEY_SHARE_TAG: share_tag,
+        KEY_STATE: SESSION_STATE_PROVISIONING,
     }
 
+
+@app.get("/sessions/{share_tag}/status")
+def game_session_status_api(share_tag: str):
+    status = databaseManager.get_session_status(share_tag)
+    if not status:
+        raise HTTPException(status_code=404, detail=ERROR_SESSION_NOT_FOUND)
+
+    state, ipv4, error = status
+    response = {KEY_SHARE_TAG: share_tag, KEY_STATE: state}
+    if ipv4:
+        response[KEY_IP_ADDRESS] = ipv4
+    if error:
+        response[KEY_ERROR] = error
+    return response
+
 @app.post("/sessions/join")
 def join_game_session_api(game_tag: str):
     result = databaseManager.get_ipv4_by_share_tag(game_tag)
@@ -109,15 +194,15 @@ def join_game_session_api(game_tag: str):
 
 # Server management endpoints (internal use only, protected by HMAC)
 @app.post("/server/end")
-def end_game_session_api(droplet_ip: str, _: None = Depends(require_internal_hmac)):
-    logger.info(f"[API DEBUG] /server/end endpoint reached - droplet_ip: {droplet_ip}")
+async def end_game_session_api(droplet_ip: str, _: None = Depends(require_internal_hmac)):
     droplet_id = databaseManager.get_droplet_id(droplet_ip)
+    heartbeatBuffer.forget(droplet_ip)
     removed = databaseManager.remove_droplet_from_db(droplet_ip)
     if not removed:
         raise HTTPException(status_code=404, detail=ERROR_DROPLET_NOT_FOUND_DB)
 
     if droplet_id and droplet_id > 0:
-        dropletManager.delete_droplet(droplet_id)
+        await dropletManager.delete_droplet(droplet_id)
         return {KEY_MESSAGE: "Game session ended and DigitalOcean droplet deleted."}
 
     return {KEY_MESSAGE: "Game session ended and local session entry removed (no DigitalOcean droplet)."}
@@ -125,10 +210,61 @@ def end_game_session_api(droplet_ip: str, _: None = Depends(require_internal_hma
 
 @app.post("/server/heartbeat")
 def server_heartbeat(heartbeat_data: ServerHeartbeatRequest, _: None = Depends(require_internal_hmac)):
-    logger.info(f"[API DEBUG] /server/heartbeat endpoint reached - droplet_ip: {heartbeat_data.droplet_ip}, connected_clients: {heartbeat_data.connected_clients}")
-    success = databaseManager.update_or_insert_game_droplet(heartbeat_data.droplet_ip, heartbeat_data.connected_clients)
+    HEARTBEATS.inc()
+    success = heartbeatBuffer.record(heartbeat_data.droplet_ip, heartbeat_data.connected_clients)
     if not success:
         raise HTTPException(status_code=404, detail=ERROR_DROPLET_NOT_FOUND_DB)
     return {
         KEY_MESSAGE: MSG_HEARTBEAT_UPDATED,
     }
+
+
+def _is_valid_heartbeat(heartbeat: ServerHeartbeatRequest) -> bool:
+    if heartbeat.connected_clients < 0:
+        return False
+    try:
+        ipaddress.ip_address(heartbeat.droplet_ip)
+    except ValueError:
+        return False
+    return True
+
+
+@app.post("/server/heartbeat/batch")
+def server_heartbeat_batch(heartbeats: list[ServerHeartbeatRequest], _: None = Depends(require_internal_hmac)):
+    if len(heartbeats) > _HEARTBEAT_BATCH_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=413,
+            detail=ERROR_HEARTBEAT_BATCH_TOO_LARGE.format(max_entries=_HEARTBEAT_BATCH_MAX_ENTRIES),
+        )
+
+    HEARTBEATS.inc(amount=len(heartbeats))
+    checks = [_is_valid_heartbeat(heartbeat) for heartbeat in heartbeats]
+    created = heartbeatBuffer.write_batch({
+        heartbeat.droplet_ip: heartbeat.connected_clients
+        for heartbeat, is_valid in zip(heartbeats, checks)
+        if is_valid
+    })
+
+    results = []
+    for heartbeat, is_valid in zip(heartbeats, checks):
+        if not is_valid:
+            entry_status = HEARTBEAT_STATUS_INVALID
+        elif heartbeat.droplet_ip in created:
+            entry_status = HEARTBEAT_STATUS_CREATED
+        else:
+            entry_status = HEARTBEAT_STATUS_UPDATED
+        results.append({KEY_DROPLET_IP: heartbeat.droplet_ip, KEY_STATUS: entry_status})
+
+    return {
+        KEY_MESSAGE: MSG_HEARTBEAT_BATCH_PROCESSED,
+        KEY_RESULTS: results,
+    }
+
+
+@app.post("/server/reconcile")
+async def reconcile_droplets_api(_: None = Depends(require_internal_hmac)):
+    try:
+        counts = await reconciler.reconcile()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return {KEY_MESSAGE: MSG_RECONCILE_COMPLETED, **counts}
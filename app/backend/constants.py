@@ -8,6 +8,20 @@ KEY_IP_ADDRESS = "ip_address"
 KEY_CONNECTED_CLIENTS = "connected_clients"
 KEY_SHARE_TAG = "share_tag"
 KEY_LAST_HEARTBEAT = "last_heartbeat"
+KEY_STATE = "state"
+KEY_DROPLET_IP = "droplet_ip"
+KEY_STATUS = "status"
+KEY_RESULTS = "results"
+
+# Session states
+SESSION_STATE_PROVISIONING = "provisioning"
+SESSION_STATE_READY = "ready"
+SESSION_STATE_FAILED = "failed"
+
+# Batched heartbeat entry statuses
+HEARTBEAT_STATUS_CREATED = "created"
+HEARTBEAT_STATUS_UPDATED = "updated"
+HEARTBEAT_STATUS_INVALID = "invalid"
 
 # Error messages
 ERROR_NO_ACTIVE_SESSION = "No active game session found for this user and game."
@@ -15,6 +29,8 @@ ERROR_DROPLET_NOT_FOUND_DB = "Droplet not found in database."
 ERROR_DROPLET_NOT_FOUND_DO = "Droplet does not exist in DigitalOcean."
 ERROR_TOKEN_NOT_SET = "DIGITALOCEAN_TOKEN is not set"
 ERROR_TAG_NOT_SET = "DROPLET_TAG is not set"
+ERROR_SESSION_NOT_FOUND = "Game session not found."
+ERROR_HEARTBEAT_BATCH_TOO_LARGE = "Heartbeat batch exceeds {max_entries} entries."
 
 # Warning messages
 WARN_DROPLET_NOT_IN_DO = "Droplet {droplet_id} does not exist in DigitalOcean."
@@ -23,3 +39,5 @@ WARN_DROPLET_NOT_IN_DB = "Droplet {droplet_id} not found in the database."
 # Success messages
 MSG_SESSION_ENDED = "Game session ended and droplet released."
 MSG_HEARTBEAT_UPDATED = "Heartbeat updated successfully."
+MSG_HEARTBEAT_BATCH_PROCESSED = "Heartbeat batch processed."
+MSG_RECONCILE_COMPLETED = "Droplet reconciliation completed."
@@ -2,134 +2,596 @@
 
 import sqlite3
 import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from .constants import SESSION_STATE_PROVISIONING, SESSION_STATE_READY
+from .metrics import DB_OPERATION_DURATION, timed
+from ..db.migrations import migrate
+
 load_dotenv()
 
 _ENV_DB_PATH = os.getenv("DB_PATH")
+_DEFAULT_CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "120"))
+_SHARE_TAG_ATTEMPTS = 10
+
+# Connection tuning
+_DEFAULT_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+_DEFAULT_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+_STATEMENT_CACHE_SIZE = 256
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+# Heartbeat upsert shared by the single and batched write paths; the share tag is
+# only used when the heartbeat inserts a new row.
+_HEARTBEAT_UPSERT_SQL = """
+    INSERT INTO game_droplets (ipv4, connected_clients, last_heartbeat, share_tag)
+    VALUES (?, ?, CURRENT_TIMESTAMP, ?)
+    ON CONFLICT(ipv4) DO UPDATE SET
+        connected_clients=excluded.connected_clients,
+        last_heartbeat=CURRENT_TIMESTAMP,
+        healthy=1,
+        reserved_until=CASE
+            WHEN excluded.connected_clients > 0 THEN NULL
+            ELSE game_droplets.reserved_until
+        END
+"""
+
+# Oldest idle, healthy, unreserved droplet; served by the idx_game_droplets_free partial index
+_FREE_DROPLET_FILTER = """
+    WHERE fresh_game = 1 AND healthy = 1
+      AND (reserved_until IS NULL OR reserved_until <= CURRENT_TIMESTAMP)
+    ORDER BY last_heartbeat ASC
+    LIMIT 1
+"""
+
+_SQL_VARIABLE_CHUNK = 500
+
+# Session index
+_NEGATIVE_CACHE_SIZE = int(os.getenv("SESSION_INDEX_NEGATIVE_CACHE_SIZE", "4096"))
+_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("SESSION_INDEX_NEGATIVE_CACHE_TTL_SECONDS", "30"))
+
+
+def _new_share_tag():
+    # Same format as the set_share_tag_after_insert trigger: 6 upper-case hex digits
+    return secrets.token_hex(3).upper()
 
 class DBManager:
+    """SQLite access for game droplets.
+
+    Each thread keeps one open connection in WAL mode, so readers never wait for
+    the heartbeat writer and sqlite3's per-connection statement cache reuses the
+    prepared statements across calls. Connections run in autocommit mode; methods
+    that issue more than one write wrap them in ``_transaction``.
+
+    Lookups by share tag and IPv4 are served from a write-through in-memory index
+    that every mutation updates after it commits. A miss falls back to the
+    database once and unknown share tags are remembered in a small TTL cache, so
+    repeated bad tags from ``/sessions/join`` do not reach SQLite.
+    """
+
     def __init__(self, db=None):
         self.db = db or _ENV_DB_PATH
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._index_loaded = False
+        self._tag_to_ipv4 = {}
+        self._ipv4_entries = {}
+        self._missing_tags = OrderedDict()
 
-    def update_db_with_droplets(self, droplets):
-        conn = sqlite3.connect(self.db)
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE,
+            )
+            synchronous = _DEFAULT_SYNCHRONOUS if _DEFAULT_SYNCHRONOUS in _SYNCHRONOUS_MODES else "NORMAL"
+            conn.execute(f"PRAGMA busy_timeout={_DEFAULT_BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={synchronous}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so the busy timeout applies
+        # instead of failing with SQLITE_BUSY when a read has to upgrade to a write.
+        conn = self._connection()
         cur = conn.cursor()
-        for droplet in droplets:
-            ipv4 = droplet["networks"]["v4"][0]["ip_address"]
-            droplet_id = droplet["id"]
-            cur.execute(
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            yield cur
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    @timed(DB_OPERATION_DURATION, "migrate")
+    def migrate(self):
+        """Apply pending schema migrations; returns the versions applied."""
+        return migrate(self._connection())
+
+    @timed(DB_OPERATION_DURATION, "load_index")
+    def load_index(self):
+        with self._index_lock:
+            rows = self._connection().execute(
                 """
-                INSERT INTO game_droplets (ipv4, droplet_id)
-                VALUES (?, ?)
-                ON CONFLICT(ipv4) DO UPDATE SET
-                    droplet_id=excluded.droplet_id,
-                    last_heartbeat=CURRENT_TIMESTAMP
+                SELECT ipv4, droplet_id, share_tag FROM game_droplets
                 """,
-                (ipv4, droplet_id),
-            )
-        conn.commit()
-        conn.close()
+            ).fetchall()
+            self._ipv4_entries = {ipv4: (droplet_id, share_tag) for ipv4, droplet_id, share_tag in rows}
+            self._tag_to_ipv4 = {share_tag: ipv4 for ipv4, _, share_tag in rows if share_tag}
+            self._missing_tags.clear()
+            self._index_loaded = True
+
+    def _ensure_index(self):
+        if not self._index_loaded:
+            self.load_index()
+
+    def _index_put(self, ipv4: str, droplet_id: int, share_tag: str):
+        with self._index_lock:
+            previous = self._ipv4_entries.get(ipv4)
+            if previous and previous[1] != share_tag:
+                self._tag_to_ipv4.pop(previous[1], None)
+            self._ipv4_entries[ipv4] = (droplet_id, share_tag)
+            if share_tag:
+                self._tag_to_ipv4[share_tag] = ipv4
+                self._missing_tags.pop(share_tag, None)
+
+    def _index_remove(self, ipv4: str):
+        with self._index_lock:
+            previous = self._ipv4_entries.pop(ipv4, None)
+            if previous and previous[1]:
+                self._tag_to_ipv4.pop(previous[1], None)
+
+    def _is_known_missing_tag(self, share_tag: str):
+        expires_at = self._missing_tags.get(share_tag)
+        if expires_at is None:
+            return False
+        if expires_at > time.monotonic():
+            return True
+        with self._index_lock:
+            self._missing_tags.pop(share_tag, None)
+        return False
+
+    def _remember_missing_tag(self, share_tag: str):
+        with self._index_lock:
+            self._missing_tags[share_tag] = time.monotonic() + _NEGATIVE_CACHE_TTL_SECONDS
+            self._missing_tags.move_to_end(share_tag)
+            while len(self._missing_tags) > _NEGATIVE_CACHE_SIZE:
+                self._missing_tags.popitem(last=False)
+
+    def _unused_share_tags(self, count: int):
+        tags = set()
+        while len(tags) < count:
+            share_tag = _new_share_tag()
+            if share_tag not in self._tag_to_ipv4:
+                tags.add(share_tag)
+        return list(tags)
+
+    def _unused_share_tag(self):
+        return self._unused_share_tags(1)[0]
+
+    def _lookup_ipv4(self, ipv4: str):
+        self._ensure_index()
+        entry = self._ipv4_entries.get(ipv4)
+        if entry is None:
+            entry = self._connection().execute(
+                """
+                SELECT droplet_id, share_tag FROM game_droplets
+                WHERE ipv4 = ?
+                """,
+                (ipv4,),
+            ).fetchone()
+            if entry:
+                self._index_put(ipv4, *entry)
+        return entry
+
+    @timed(DB_OPERATION_DURATION, "update_db_with_droplets")
+    def update_db_with_droplets(self, droplets):
+        # Share tags are generated here rather than by the insert trigger so RETURNING
+        # reports the final tag for the index.
+        with self._transaction() as cur:
+            upserted = []
+            for droplet in droplets:
+                cur.execute(
+                    """
+                    INSERT INTO game_droplets (ipv4, droplet_id, share_tag)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(ipv4) DO UPDATE SET
+                        droplet_id=excluded.droplet_id,
+                        last_heartbeat=CURRENT_TIMESTAMP
+                    RETURNING ipv4, droplet_id, share_tag
+                    """,
+                    (droplet["networks"]["v4"][0]["ip_address"], droplet["id"], self._unused_share_tag()),
+                )
+                upserted.extend(cur.fetchall())
+        for row in upserted:
+            self._index_put(*row)
 
+    @timed(DB_OPERATION_DURATION, "update_or_insert_game_droplet")
     def update_or_insert_game_droplet(self, droplet_ip: str, connected_clients: int):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO game_droplets (ipv4, connected_clients, last_heartbeat)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(ipv4) DO UPDATE SET
-                connected_clients=excluded.connected_clients,
-                last_heartbeat=CURRENT_TIMESTAMP
-            """,
-            (droplet_ip, connected_clients),
-        )
-        conn.commit()
-        conn.close()
+        conn = self._connection()
+        if droplet_ip in self._ipv4_entries:
+            # Known droplet: plain UPDATE, no share tag generation or RETURNING round trip
+            cur = conn.execute(
+                """
+                UPDATE game_droplets
+                SET connected_clients = ?,
+                    last_heartbeat = CURRENT_TIMESTAMP,
+                    healthy = 1,
+                    reserved_until = CASE WHEN ? > 0 THEN NULL ELSE reserved_until END
+                WHERE ipv4 = ?
+                """,
+                (connected_clients, connected_clients, droplet_ip),
+            )
+            if cur.rowcount:
+                return True
+
+        row = conn.execute(
+            _HEARTBEAT_UPSERT_SQL + "RETURNING droplet_id, share_tag",
+            (droplet_ip, connected_clients, self._unused_share_tag()),
+        ).fetchall()
+        self._index_put(droplet_ip, *row[0])
         return True
 
+    @timed(DB_OPERATION_DURATION, "update_or_insert_game_droplets")
+    def update_or_insert_game_droplets(self, heartbeats):
+        """Apply ``(droplet_ip, connected_clients)`` heartbeats in one transaction.
+
+        Returns the set of IPv4s that did not have a row before.
+        """
+        heartbeats = list(heartbeats)
+        if not heartbeats:
+            return set()
+        unindexed = list({ipv4 for ipv4, _ in heartbeats if ipv4 not in self._ipv4_entries})
+        with self._transaction() as cur:
+            existing = {ipv4 for ipv4, _, _ in self._select_entries(cur, unindexed)}
+            for attempt in range(_SHARE_TAG_ATTEMPTS):
+                # Only rows that may be inserted need a tag; known droplets keep theirs.
+                tags = dict(zip(unindexed, self._unused_share_tags(len(unindexed))))
+                try:
+                    cur.executemany(
+                        _HEARTBEAT_UPSERT_SQL,
+                        [(ipv4, connected_clients, tags.get(ipv4)) for ipv4, connected_clients in heartbeats],
+                    )
+                    break
+                except sqlite3.IntegrityError:
+                    # A tag collided with a row the index does not know about. Rows
+                    # already written by executemany stay and are updated on retry.
+                    if attempt == _SHARE_TAG_ATTEMPTS - 1:
+                        raise
+            new_entries = self._select_entries(cur, unindexed)
+        for entry in new_entries:
+            self._index_put(*entry)
+        return {ipv4 for ipv4, _, _ in new_entries} - existing
+
+    @timed(DB_OPERATION_DURATION, "reconcile_droplets")
+    def reconcile_droplets(self, droplet_ids: dict, listed_since: float = None):
+        """Bring ``game_droplets`` in line with ``{ipv4: droplet_id}`` listed from DigitalOcean.
+
+        Only the difference is written, in one transaction. Rows of droplets that are no
+        longer listed are deleted unless they were written after ``listed_since`` (epoch
+        seconds), so droplets created while the listing ran are kept. Rows without a
+        droplet id (local servers) are never deleted. Returns the number of inserted,
+        updated and deleted rows.
+        """
+        listed_since = time.time() if listed_since is None else listed_since
+        with self._transaction() as cur:
+            current = {
+                ipv4: (droplet_id, written_before)
+                for ipv4, droplet_id, written_before in cur.execute(
+                    """
+                    SELECT ipv4, droplet_id, last_heartbeat < datetime(?, 'unixepoch')
+                    FROM game_droplets
+                    """,
+                    (listed_since,),
+                )
+            }
+            inserts = [ipv4 for ipv4 in droplet_ids if ipv4 not in current]
+            updates = [
+                (droplet_id, ipv4) for ipv4, droplet_id in droplet_ids.items()
+                if ipv4 in current and current[ipv4][0] != droplet_id
+            ]
+            deletes = [
+                (ipv4,) for ipv4, (droplet_id, written_before) in current.items()
+                if droplet_id and written_before and ipv4 not in droplet_ids
+            ]
+
+            for attempt in range(_SHARE_TAG_ATTEMPTS):
+                tags = self._unused_share_tags(len(inserts))
+                try:
+                    cur.executemany(
+                        """
+                        INSERT INTO game_droplets (ipv4, droplet_id, share_tag)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(ipv4) DO NOTHING
+                        """,
+                        [(ipv4, droplet_ids[ipv4], tag) for ipv4, tag in zip(inserts, tags)],
+                    )
+                    break
+                except sqlite3.IntegrityError:
+                    if attempt == _SHARE_TAG_ATTEMPTS - 1:
+                        raise
+            cur.executemany("UPDATE game_droplets SET droplet_id = ? WHERE ipv4 = ?", updates)
+            cur.executemany("DELETE FROM game_droplets WHERE ipv4 = ?", deletes)
+            changed_entries = self._select_entries(cur, inserts + [ipv4 for _, ipv4 in updates])
+
+        for entry in changed_entries:
+            self._index_put(*entry)
+        for (ipv4,) in deletes:
+            self._index_remove(ipv4)
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+    def _select_entries(self, cur, ipv4s):
+        entries = []
+        for start in range(0, len(ipv4s), _SQL_VARIABLE_CHUNK):
+            chunk = ipv4s[start:start + _SQL_VARIABLE_CHUNK]
+            cur.execute(
+                f"""
+                SELECT ipv4, droplet_id, share_tag FROM game_droplets
+                WHERE ipv4 IN ({", ".join("?" * len(chunk))})
+                """,
+                chunk,
+            )
+            entries.extend(cur.fetchall())
+        return entries
+
+    @timed(DB_OPERATION_DURATION, "get_droplets_without_player")
     def get_droplets_without_player(self):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
+        result = self._connection().execute(
             """
             SELECT ipv4, share_tag FROM game_droplets
-            WHERE fresh_game = 1
-            ORDER BY last_heartbeat ASC
-            """,
-        )
-        droplets = [row for row in cur.fetchall()]
-        conn.close()
+            """ + _FREE_DROPLET_FILTER,
+        ).fetchone()
 
-        ipv4, share_tag = droplets[0] if droplets else (None, None)
+        ipv4, share_tag = result if result else (None, None)
         return ipv4, share_tag
 
+    @timed(DB_OPERATION_DURATION, "claim_free_droplet")
+    def claim_free_droplet(self, lease_seconds: int = None):
+        """Select and reserve the oldest free droplet in one write transaction.
+
+        The reservation expires after ``lease_seconds`` unless a heartbeat reports
+        connected clients first, so an abandoned claim returns to the pool.
+        """
+        lease = _DEFAULT_CLAIM_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        with self._transaction() as cur:
+            cur.execute(
+                """
+                UPDATE game_droplets
+                SET reserved_until = datetime('now', ?)
+                WHERE ipv4 = (
+                    SELECT ipv4 FROM game_droplets
+                """ + _FREE_DROPLET_FILTER + """
+                )
+                RETURNING ipv4, share_tag
+                """,
+                (f"+{lease} seconds",),
+            )
+            claimed = cur.fetchone()
+
+        ipv4, share_tag = claimed if claimed else (None, None)
+        return ipv4, share_tag
+
+    @timed(DB_OPERATION_DURATION, "reserve_droplet")
+    def reserve_droplet(self, ipv4: str, lease_seconds: int = None):
+        lease = _DEFAULT_CLAIM_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        # fetchall() steps the RETURNING statement to completion so its implicit transaction commits
+        result = self._connection().execute(
+            """
+            UPDATE game_droplets
+            SET reserved_until = datetime('now', ?)
+            WHERE ipv4 = ?
+            RETURNING share_tag
+            """,
+            (f"+{lease} seconds", ipv4),
+        ).fetchall()
+        return result[0][0] if result else None
+
+    @timed(DB_OPERATION_DURATION, "get_pool_counts")
+    def get_pool_counts(self):
+        idle, total = self._connection().execute(
+            """
+            SELECT
+                COALESCE(SUM(fresh_game = 1 AND healthy = 1 AND (reserved_until IS NULL OR reserved_until <= CURRENT_TIMESTAMP)), 0),
+                COUNT(*)
+            FROM game_droplets
+            """,
+        ).fetchone()
+        return idle, total
+
+    @timed(DB_OPERATION_DURATION, "mark_stale_droplets")
+    def mark_stale_droplets(self, max_age_seconds: float):
+        """Flag droplets without a heartbeat for ``max_age_seconds`` as unhealthy.
+
+        Unhealthy droplets are skipped by matchmaking; returns the number newly flagged.
+        """
+        rows = self._connection().execute(
+            """
+            UPDATE game_droplets
+            SET healthy = 0
+            WHERE healthy = 1
+              AND last_heartbeat < datetime('now', ?)
+            RETURNING ipv4
+            """,
+            (f"-{max_age_seconds} seconds",),
+        ).fetchall()
+        return len(rows)
+
+    @timed(DB_OPERATION_DURATION, "get_droplet_state_counts")
+    def get_droplet_state_counts(self):
+        fresh, occupied, stale = self._connection().execute(
+            """
+            SELECT
+                COALESCE(SUM(healthy = 1 AND fresh_game = 1), 0),
+                COALESCE(SUM(healthy = 1 AND fresh_game = 0), 0),
+                COALESCE(SUM(healthy = 0), 0)
+            FROM game_droplets
+            """,
+        ).fetchone()
+        provisioning = self._connection().execute(
+            """
+            SELECT COUNT(*) FROM provisioning_sessions
+            WHERE state = ?
+            """,
+            (SESSION_STATE_PROVISIONING,),
+        ).fetchone()[0]
+        return {"fresh": fresh, "occupied": occupied, "provisioning": provisioning, "stale": stale}
+
+    @timed(DB_OPERATION_DURATION, "get_unhealthy_droplets")
+    def get_unhealthy_droplets(self):
+        return self._connection().execute(
+            """
+            SELECT ipv4, droplet_id FROM game_droplets
+            WHERE healthy = 0
+            """,
+        ).fetchall()
+
     def _add_droplet_to_db(self, ipv4: str):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
+        rows = self._connection().execute(
             """
-            INSERT OR IGNORE INTO game_droplets (ipv4)
-            VALUES (?)
+            INSERT INTO game_droplets (ipv4, share_tag)
+            VALUES (?, ?)
+            ON CONFLICT(ipv4) DO NOTHING
+            RETURNING droplet_id, share_tag
             """,
-            (ipv4,),
-        )
-        conn.commit()
-        conn.close()
+            (ipv4, self._unused_share_tag()),
+        ).fetchall()
+        if rows:
+            self._index_put(ipv4, *rows[0])
 
+    @timed(DB_OPERATION_DURATION, "remove_droplet_from_db")
     def remove_droplet_from_db(self, ipv4: str):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
+        cur = self._connection().execute(
             """
             DELETE FROM game_droplets
             WHERE ipv4 = ?
             """,
             (ipv4,),
         )
-        removed_rows = cur.rowcount
-        conn.commit()
-        conn.close()
-        return removed_rows > 0
+        self._index_remove(ipv4)
+        return cur.rowcount > 0
 
+    @timed(DB_OPERATION_DURATION, "get_droplet_id")
     def get_droplet_id(self, ipv4: str):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT droplet_id FROM game_droplets
-            WHERE ipv4 = ?
-            """,
-            (ipv4,),
-        )
-        result = cur.fetchone()
-        conn.close()
-        return result[0] if result else None
-    
+        entry = self._lookup_ipv4(ipv4)
+        return entry[0] if entry else None
+
+    @timed(DB_OPERATION_DURATION, "get_ipv4_by_share_tag")
     def get_ipv4_by_share_tag(self, share_tag: str):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
+        self._ensure_index()
+        ipv4 = self._tag_to_ipv4.get(share_tag)
+        if ipv4 is not None or self._is_known_missing_tag(share_tag):
+            return ipv4
+
+        result = self._connection().execute(
             """
-            SELECT ipv4 FROM game_droplets
+            SELECT ipv4, droplet_id FROM game_droplets
             WHERE share_tag = ?
             """,
             (share_tag,),
-        )
-        result = cur.fetchone()
-        conn.close()
-        return result[0] if result else None
+        ).fetchone()
+        if not result:
+            self._remember_missing_tag(share_tag)
+            return None
+        self._index_put(result[0], result[1], share_tag)
+        return result[0]
 
+    @timed(DB_OPERATION_DURATION, "get_share_tag_by_ipv4")
     def get_share_tag_by_ipv4(self, ipv4: str):
-        conn = sqlite3.connect(self.db)
-        cur = conn.cursor()
-        cur.execute(
+        entry = self._lookup_ipv4(ipv4)
+        return entry[1] if entry else None
+
+    @timed(DB_OPERATION_DURATION, "create_provisioning_session")
+    def create_provisioning_session(self):
+        conn = self._connection()
+        for _ in range(_SHARE_TAG_ATTEMPTS):
+            share_tag = self._unused_share_tag()
+            try:
+                cur = conn.execute(
+                    """
+                    INSERT INTO provisioning_sessions (share_tag, state)
+                    SELECT ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM game_droplets WHERE share_tag = ?)
+                    """,
+                    (share_tag, SESSION_STATE_PROVISIONING, share_tag),
+                )
+            except sqlite3.IntegrityError:
+                continue
+            if cur.rowcount == 1:
+                return share_tag
+        raise RuntimeError("Could not allocate a unique share tag.")
+
+    @timed(DB_OPERATION_DURATION, "update_provisioning_session")
+    def update_provisioning_session(self, share_tag: str, state: str, droplet_id: int = None, error: str = None):
+        cur = self._connection().execute(
             """
-            SELECT share_tag FROM game_droplets
-            WHERE ipv4 = ?
+            UPDATE provisioning_sessions
+            SET state = ?,
+                droplet_id = COALESCE(?, droplet_id),
+                error = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE share_tag = ?
             """,
-            (ipv4,),
+            (state, droplet_id, error, share_tag),
         )
-        result = cur.fetchone()
-        conn.close()
-        return result[0] if result else None
\ No newline at end of file
+        return cur.rowcount > 0
+
+    @timed(DB_OPERATION_DURATION, "assign_droplet_to_session")
+    def assign_droplet_to_session(self, share_tag: str, ipv4: str, droplet_id: int, lease_seconds: int = None):
+        """Store a provisioned droplet under the session's share tag and reserve it for the player."""
+        lease = _DEFAULT_CLAIM_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        with self._transaction() as cur:
+            cur.execute(
+                """
+                INSERT INTO game_droplets (ipv4, droplet_id, share_tag, reserved_until)
+                VALUES (?, ?, ?, datetime('now', ?))
+                ON CONFLICT(ipv4) DO UPDATE SET
+                    droplet_id=excluded.droplet_id,
+                    share_tag=excluded.share_tag,
+                    reserved_until=excluded.reserved_until,
+                    last_heartbeat=CURRENT_TIMESTAMP
+                """,
+                (ipv4, droplet_id, share_tag, f"+{lease} seconds"),
+            )
+            cur.execute(
+                """
+                DELETE FROM provisioning_sessions
+                WHERE share_tag = ?
+                """,
+                (share_tag,),
+            )
+        self._index_put(ipv4, droplet_id, share_tag)
+
+    @timed(DB_OPERATION_DURATION, "get_session_status")
+    def get_session_status(self, share_tag: str):
+        """Return ``(state, ipv4, error)`` for a share tag, or ``None`` if it is unknown."""
+        return self._connection().execute(
+            """
+            SELECT ?, ipv4, NULL FROM game_droplets
+            WHERE share_tag = ?
+            UNION ALL
+            SELECT state, NULL, error FROM provisioning_sessions
+            WHERE share_tag = ?
+            LIMIT 1
+            """,
+            (SESSION_STATE_READY, share_tag, share_tag),
+        ).fetchone()
@@ -0,0 +1,123 @@
+"""Async DigitalOcean API client"""
+
+import asyncio
+import logging
+import os
+import random
+import httpx
+from dotenv import load_dotenv
+
+from .rate_limiter import PRIORITY_BACKGROUND, RateLimitScheduler
+
+load_dotenv()
+
+# API URLs (point DIGITALOCEAN_API_BASE at benchmarks/fake_digitalocean.py to run offline)
+_DIGITALOCEAN_API_BASE = os.getenv("DIGITALOCEAN_API_BASE", "https://api.digitalocean.com/v2")
+
+# Connection pool, timeout and retry defaults
+_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("DIGITALOCEAN_TIMEOUT_SECONDS", "10"))
+_DEFAULT_MAX_RETRIES = int(os.getenv("DIGITALOCEAN_MAX_RETRIES", "3"))
+_DEFAULT_BACKOFF_BASE_SECONDS = float(os.getenv("DIGITALOCEAN_BACKOFF_BASE_SECONDS", "0.5"))
+_DEFAULT_BACKOFF_MAX_SECONDS = float(os.getenv("DIGITALOCEAN_BACKOFF_MAX_SECONDS", "8"))
+_DEFAULT_MAX_CONNECTIONS = int(os.getenv("DIGITALOCEAN_MAX_CONNECTIONS", "20"))
+_DEFAULT_KEEPALIVE_SECONDS = 30.0
+
+_RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Failures where the request provably never reached DigitalOcean
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+logger = logging.getLogger(__name__)
+
+
+class DigitalOceanClient:
+    """Shared keep-alive connection pool for all DigitalOcean API calls.
+
+    Requests are retried with full-jitter exponential backoff on transport errors,
+    429 and 5xx responses. Non-idempotent requests (droplet creation) are only
+    retried when DigitalOcean cannot have acted on them: connection failures and
+    429 rate-limit rejections. Every attempt first waits for the rate-limit budget
+    at the request's priority.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = None,
+        timeout: float = None,
+        max_retries: int = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+        max_connections: int = None,
+        transport: httpx.AsyncBaseTransport = None,
+        rate_limiter: RateLimitScheduler = None,
+    ):
+        self.base_url = (base_url or _DIGITALOCEAN_API_BASE).rstrip("/")
+        self.timeout = timeout or _DEFAULT_TIMEOUT_SECONDS
+        self.max_retries = _DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = _DEFAULT_BACKOFF_BASE_SECONDS if backoff_base is None else backoff_base
+        self.backoff_max = _DEFAULT_BACKOFF_MAX_SECONDS if backoff_max is None else backoff_max
+        self.max_connections = max_connections or _DEFAULT_MAX_CONNECTIONS
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        self._transport = transport
+        self.rate_limiter = rate_limiter or RateLimitScheduler()
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=_DEFAULT_KEEPALIVE_SECONDS,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    def _backoff_delay(self, attempt: int):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict = None,
+        json: dict = None,
+        timeout: float = None,
+        idempotent: bool = True,
+        priority: int = PRIORITY_BACKGROUND,
+    ) -> httpx.Response:
+        client = self._get_client()
+        request_timeout = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await self.rate_limiter.acquire(priority)
+            try:
+                response = await client.request(method, path, params=params, json=json, timeout=request_timeout)
+            except httpx.TransportError as exc:
+                self.rate_limiter.release()
+                if last_attempt or not (idempotent or isinstance(exc, _UNSENT_ERRORS)):
+                    raise
+                logger.warning("DigitalOcean %s %s failed (%s), retrying", method, path, exc)
+            except BaseException:
+                self.rate_limiter.release()
+                raise
+            else:
+                self.rate_limiter.release(response.status_code, response.headers)
+                retryable = response.status_code == 429 or (idempotent and response.status_code in _RETRY_STATUS_CODES)
+                if last_attempt or not retryable:
+                    return response
+                logger.warning("DigitalOcean %s %s returned %d, retrying", method, path, response.status_code)
+            await asyncio.sleep(self._backoff_delay(attempt))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,73 +1,116 @@
 """DigitalOcean operations"""
 
+import asyncio
+import logging
 import os
-import requests
+import time
+import httpx
 from .constants import (
     WARN_DROPLET_NOT_IN_DB, ERROR_TOKEN_NOT_SET, ERROR_TAG_NOT_SET
 )
+from .digitalocean_client import DigitalOceanClient
+from .metrics import DIGITALOCEAN_OPERATION_DURATION, DROPLET_CREATIONS, DROPLET_DELETIONS, timed
+from .rate_limiter import PRIORITY_PLAYER
 
 # Droplet creation defaults
 _DEFAULT_SNAPSHOT_ID = os.getenv("SNAPSHOT_ID", None)
 _DEFAULT_DROPLET_TAG = os.getenv("DROPLET_TAG", "femquest-server")
 _DEFAULT_REGION = os.getenv("DROPLET_REGION", "nyc3")
 _DEFAULT_SIZE = os.getenv("DROPLET_SIZE", "s-1vcpu-1gb")
+_DEFAULT_POLL_INTERVAL_SECONDS = float(os.getenv("DROPLET_POLL_INTERVAL_SECONDS", "5"))
+_DEFAULT_ACTIVE_TIMEOUT_SECONDS = float(os.getenv("DROPLET_ACTIVE_TIMEOUT_SECONDS", "600"))
 
-# API URLs
-_DIGITALOCEAN_API_BASE = "https://api.digitalocean.com/v2"
-_DIGITALOCEAN_DROPLETS_URL = f"{_DIGITALOCEAN_API_BASE}/droplets"
+# API paths (relative to the DigitalOcean API base URL)
+_DIGITALOCEAN_DROPLETS_PATH = "/droplets"
+_DIGITALOCEAN_PAGE_SIZE = 200
 _DIGITALOCEAN_TOKEN = os.getenv("DIGITALOCEAN_TOKEN", None)
 
 from .database_manager import DBManager
 
+logger = logging.getLogger(__name__)
+
+
+def _get_public_ipv4(droplet: dict):
+    networks = droplet.get("networks", {}).get("v4", [])
+    for network in networks:
+        if network.get("type") == "public":
+            return network.get("ip_address")
+    return networks[0].get("ip_address") if networks else None
+
+
 class DropletManager:
-    def __init__(self, dbManager: DBManager, token: str = None):
+    def __init__(self, dbManager: DBManager, token: str = None, client: DigitalOceanClient = None):
         self.dbManager = dbManager
         self.token = token or _DIGITALOCEAN_TOKEN
         self.droplet_tag = _DEFAULT_DROPLET_TAG
         self._require_token_and_tag()
-        self.headers = self._headers()
+        self.client = client or DigitalOceanClient(self.token)
 
     def _require_token_and_tag(self):
         if not self.token:
             raise ValueError(ERROR_TOKEN_NOT_SET)
         if not self.droplet_tag:
             raise ValueError(ERROR_TAG_NOT_SET)
-        
-    def _headers(self):
-        return {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-    
-    def _fetch_tagged_droplets(self):
-        params = {"tag_name": self.droplet_tag}
-        response = requests.get(_DIGITALOCEAN_DROPLETS_URL, headers=self.headers, params=params, timeout=10)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch droplets: {response.text}")
-        
-        self.dbManager.update_db_with_droplets(response.json().get("droplets", []))
-        return response.json().get("droplets", [])
 
-    def get_droplet_id(self, droplet_ip: str):
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "list_tagged_droplets")
+    async def list_tagged_droplets(self):
+        """Return every droplet carrying the droplet tag, following DigitalOcean's pagination."""
+        droplets = []
+        params = {"tag_name": self.droplet_tag, "per_page": _DIGITALOCEAN_PAGE_SIZE, "page": 1}
+        while True:
+            response = await self.client.request("GET", _DIGITALOCEAN_DROPLETS_PATH, params=params)
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch droplets: {response.text}")
+
+            body = response.json()
+            droplets.extend(body.get("droplets", []))
+            next_page = body.get("links", {}).get("pages", {}).get("next")
+            if not next_page:
+                return droplets
+            params = {**params, "page": int(httpx.URL(next_page).params["page"])}
+
+    async def _fetch_tagged_droplets(self):
+        droplets = await self.list_tagged_droplets()
+        self.dbManager.update_db_with_droplets(droplets)
+        return droplets
+
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "reconcile")
+    async def reconcile(self):
+        """Sync ``game_droplets`` with the tagged droplets on DigitalOcean and return the change counts."""
+        listed_since = time.time()
+        droplets = await self.list_tagged_droplets()
+        droplet_ids = {}
+        for droplet in droplets:
+            ipv4 = _get_public_ipv4(droplet)
+            if ipv4:
+                droplet_ids[ipv4] = droplet["id"]
+        return self.dbManager.reconcile_droplets(droplet_ids, listed_since=listed_since)
+
+    async def get_droplet_id(self, droplet_ip: str):
         result = self.dbManager.get_droplet_id(droplet_ip)
         if result:
             return result
         else:
-            _fetch_result = self._fetch_tagged_droplets()
+            _fetch_result = await self._fetch_tagged_droplets()
             for droplet in _fetch_result:
                 ipv4 = droplet["networks"]["v4"][0]["ip_address"]
                 if ipv4 == droplet_ip:
                     return droplet["id"]
             print(WARN_DROPLET_NOT_IN_DB.format(droplet_id=droplet_ip))
         return None
-    
-    def delete_droplet(self, droplet_id: int):
-        response = requests.delete(f"{_DIGITALOCEAN_DROPLETS_URL}/{droplet_id}", headers=self.headers, timeout=10)
+
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "delete_droplet")
+    async def delete_droplet(self, droplet_id: int, missing_ok: bool = False):
+        response = await self.client.request("DELETE", f"{_DIGITALOCEAN_DROPLETS_PATH}/{droplet_id}")
+        if missing_ok and response.status_code == 404:
+            return {"message": f"Droplet {droplet_id} was already deleted."}
         if response.status_code != 204:
             raise Exception(f"Failed to delete droplet {droplet_id}: {response.text}")
+        DROPLET_DELETIONS.inc()
         return {"message": f"Droplet {droplet_id} deleted successfully."}
-    
-    async def create_droplet(self):
+
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "request_droplet")
+    async def request_droplet(self, priority: int = PRIORITY_PLAYER):
         data = {
             "name": f"game-session-{self.droplet_tag}",
             "region": _DEFAULT_REGION,
@@ -75,24 +118,58 @@ class DropletManager:
             "image": _DEFAULT_SNAPSHOT_ID,
             "tags": [self.droplet_tag]
         }
-        response = requests.post(_DIGITALOCEAN_DROPLETS_URL, headers=self.headers, json=data, timeout=10)
+        response = await self.client.request("POST", _DIGITALOCEAN_DROPLETS_PATH, json=data, idempotent=False, priority=priority)
         if response.status_code != 202:
             raise Exception(f"Failed to create droplet: {response.text}")
-        
+
         new_droplet = response.json().get("droplet", {})
-        # print(f"Created droplet response: {response.json()}")
-        if not new_droplet:
+        if not new_droplet or not new_droplet.get("id"):
             raise Exception("Droplet creation response did not contain droplet data.")
-        id = new_droplet.get("id")
-        
-        response_ip = requests.post(f"{_DIGITALOCEAN_DROPLETS_URL}/{id}", headers=self.headers, timeout=10)
-        if response_ip.status_code != 200:
-            raise Exception(f"Failed to get IP for droplet {id}: {response_ip.text}")
-        ipv4 = response_ip.json().get("ip_address")
-        if not id or not ipv4:
-            raise Exception("Droplet creation response missing id or ipv4 address.")
-        
-        self.dbManager.update_db_with_droplets([new_droplet])
-        return ipv4
-              
-       
+        DROPLET_CREATIONS.inc()
+        return new_droplet["id"]
+
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "get_droplet")
+    async def get_droplet(self, droplet_id: int, priority: int = PRIORITY_PLAYER):
+        response = await self.client.request("GET", f"{_DIGITALOCEAN_DROPLETS_PATH}/{droplet_id}", priority=priority)
+        if response.status_code != 200:
+            raise Exception(f"Failed to get droplet {droplet_id}: {response.text}")
+        return response.json().get("droplet", {})
+
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "wait_until_active")
+    async def wait_until_active(
+        self, droplet_id: int, poll_interval: float = None, timeout: float = None, priority: int = PRIORITY_PLAYER,
+    ):
+        """Poll DigitalOcean until the droplet is ``active`` and has a public IPv4."""
+        poll_interval = _DEFAULT_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        timeout = _DEFAULT_ACTIVE_TIMEOUT_SECONDS if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            droplet = await self.get_droplet(droplet_id, priority=priority)
+            if droplet.get("status") == "active" and _get_public_ipv4(droplet):
+                return droplet
+            if loop.time() + poll_interval > deadline:
+                raise TimeoutError(f"Droplet {droplet_id} did not become active within {timeout:.0f}s.")
+            await asyncio.sleep(poll_interval)
+
+    @timed(DIGITALOCEAN_OPERATION_DURATION, "create_droplet")
+    async def create_droplet(self, priority: int = PRIORITY_PLAYER):
+        droplet_id = await self.request_droplet(priority=priority)
+        try:
+            droplet = await self.wait_until_active(droplet_id, priority=priority)
+        except Exception:
+            await self.discard_droplet(droplet_id)
+            raise
+
+        self.dbManager.update_db_with_droplets([droplet])
+        return _get_public_ipv4(droplet)
+
+    async def discard_droplet(self, droplet_id: int):
+        """Best-effort delete of a droplet that never became usable, so it does not keep billing."""
+        try:
+            await self.delete_droplet(droplet_id)
+        except Exception as exc:
+            logger.warning("Could not delete unusable droplet %s: %s", droplet_id, exc)
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,108 @@
+"""Coalescing of game server heartbeats into batched database writes"""
+
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+from .database_manager import DBManager
+
+load_dotenv()
+
+# HEARTBEAT_FLUSH_INTERVAL_MS=0 (default) writes every heartbeat straight through
+_DEFAULT_FLUSH_INTERVAL_MS = int(os.getenv("HEARTBEAT_FLUSH_INTERVAL_MS", "0"))
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatBuffer:
+    """Holds the latest heartbeat per droplet and flushes them in one transaction.
+
+    A droplet going from zero to one or more connected clients is flushed at once,
+    so matchmaking never hands out a droplet that already has players on it.
+    """
+
+    def __init__(self, dbManager: DBManager, flush_interval_ms: int = None):
+        self.dbManager = dbManager
+        self.flush_interval_ms = _DEFAULT_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms
+        self._pending = {}
+        self._last_clients = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.flush_interval_ms > 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="heartbeat-flush", daemon=True)
+        self._thread.start()
+        logger.info("Heartbeat coalescing enabled (flush every %d ms)", self.flush_interval_ms)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def record(self, droplet_ip: str, connected_clients: int):
+        if not self.running:
+            return self.dbManager.update_or_insert_game_droplet(droplet_ip, connected_clients)
+
+        with self._lock:
+            previous = self._last_clients.get(droplet_ip)
+            self._last_clients[droplet_ip] = connected_clients
+            self._pending[droplet_ip] = connected_clients
+        if connected_clients > 0 and (previous is None or previous <= 0):
+            self.flush()
+        return True
+
+    def write_batch(self, heartbeats: dict):
+        """Write a batch of heartbeats straight through, superseding buffered ones.
+
+        Returns the set of droplet IPs that were new to the database.
+        """
+        if self.running:
+            with self._lock:
+                for droplet_ip, connected_clients in heartbeats.items():
+                    self._pending.pop(droplet_ip, None)
+                    self._last_clients[droplet_ip] = connected_clients
+        return self.dbManager.update_or_insert_game_droplets(heartbeats.items())
+
+    def forget(self, droplet_ip: str):
+        with self._lock:
+            self._pending.pop(droplet_ip, None)
+            self._last_clients.pop(droplet_ip, None)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self.dbManager.update_or_insert_game_droplets(batch.items())
+                return len(batch)
+            except Exception as exc:
+                logger.warning("Heartbeat flush of %d droplets failed: %s", len(batch), exc)
+                with self._lock:
+                    # Keep the batch for the next flush unless a newer heartbeat arrived meanwhile
+                    for droplet_ip, connected_clients in batch.items():
+                        self._pending.setdefault(droplet_ip, connected_clients)
+                return 0
+
+    def _run(self):
+        interval = self.flush_interval_ms / 1000
+        while not self._stop.wait(interval):
+            self.flush()
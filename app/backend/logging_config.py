@@ -0,0 +1,105 @@
+"""Structured JSON logging through a background queue"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_DEFAULT_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+_DEFAULT_LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+_DEFAULT_REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_DEFAULT_SAMPLE_RATE", "1"))
+# Comma-separated ``route=rate`` pairs, e.g. "/server/heartbeat=0.01,/sessions/start=1"
+_DEFAULT_REQUEST_LOG_SAMPLE_RATES = os.getenv("REQUEST_LOG_SAMPLE_RATES", "/server/heartbeat=0.01")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the standard fields plus any ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread as-is and drops them when the queue is full.
+
+    Formatting happens on the listener thread, and a slow stdout or disk can never
+    block the caller; ``dropped`` counts records lost to a full queue.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord):
+        # The listener runs in this process, so the record needs no pickling-safe copy
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(raw: str) -> dict:
+    rates = {}
+    for pair in raw.split(","):
+        route, _, rate = pair.strip().partition("=")
+        if route and rate:
+            rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class RequestLogSampler:
+    """Decides per route whether a request gets a log line; failed requests are always logged."""
+
+    def __init__(self, rates: dict = None, default_rate: float = None):
+        self.rates = parse_sample_rates(_DEFAULT_REQUEST_LOG_SAMPLE_RATES) if rates is None else rates
+        self.default_rate = _DEFAULT_REQUEST_LOG_SAMPLE_RATE if default_rate is None else default_rate
+
+    def should_log(self, route: str, status_code: int) -> bool:
+        if status_code >= 400:
+            return True
+        rate = self.rates.get(route, self.default_rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def configure_logging(level: str = None, queue_size: int = None):
+    """Route the root logger through a bounded queue to a JSON stdout handler.
+
+    Returns the started listener; stop it on shutdown to flush what is queued.
+    """
+    log_queue = queue.Queue(maxsize=_DEFAULT_LOG_QUEUE_SIZE if queue_size is None else queue_size)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level or _DEFAULT_LOG_LEVEL)
+    listener.start()
+    return listener
@@ -0,0 +1,120 @@
+"""Warm pool of pre-provisioned droplets"""
+
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+
+from .database_manager import DBManager
+from .droplet_manager import DropletManager, _DEFAULT_SNAPSHOT_ID
+from .rate_limiter import PRIORITY_BACKGROUND
+
+load_dotenv()
+
+# Pool defaults (POOL_MIN_IDLE=0 disables pre-provisioning)
+_DEFAULT_POOL_MIN_IDLE = int(os.getenv("POOL_MIN_IDLE", "0"))
+_DEFAULT_POOL_MAX_SIZE = int(os.getenv("POOL_MAX_SIZE", "10"))
+_DEFAULT_POOL_REFILL_CONCURRENCY = int(os.getenv("POOL_REFILL_CONCURRENCY", "2"))
+_DEFAULT_POOL_CHECK_INTERVAL_SECONDS = float(os.getenv("POOL_CHECK_INTERVAL_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+class PoolManager:
+    """Keeps a minimum number of idle droplets of one snapshot ready to be claimed.
+
+    Refills run in the background: ``request_refill`` only wakes the refill loop,
+    so callers on the request path never wait on DigitalOcean.
+    """
+
+    def __init__(
+        self,
+        dbManager: DBManager,
+        dropletManager: DropletManager,
+        snapshot_id: str = None,
+        min_idle: int = None,
+        max_size: int = None,
+        refill_concurrency: int = None,
+        check_interval: float = None,
+    ):
+        self.dbManager = dbManager
+        self.dropletManager = dropletManager
+        self.snapshot_id = snapshot_id or _DEFAULT_SNAPSHOT_ID
+        self.min_idle = _DEFAULT_POOL_MIN_IDLE if min_idle is None else min_idle
+        self.max_size = _DEFAULT_POOL_MAX_SIZE if max_size is None else max_size
+        self.refill_concurrency = max(1, refill_concurrency or _DEFAULT_POOL_REFILL_CONCURRENCY)
+        self.check_interval = check_interval or _DEFAULT_POOL_CHECK_INTERVAL_SECONDS
+        self._in_flight = 0
+        self._creations = set()
+        self._wake = None
+        self._loop_task = None
+
+    @property
+    def enabled(self):
+        return self.min_idle > 0
+
+    @property
+    def running(self):
+        return self._loop_task is not None and not self._loop_task.done()
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(
+            "Droplet pool started (snapshot=%s, min_idle=%d, max_size=%d, refill_concurrency=%d)",
+            self.snapshot_id, self.min_idle, self.max_size, self.refill_concurrency,
+        )
+
+    async def stop(self):
+        tasks = [task for task in (self._loop_task, *self._creations) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self._creations.clear()
+
+    def request_refill(self):
+        if self.running:
+            self._wake.set()
+
+    def refill_deficit(self):
+        idle, total = self.dbManager.get_pool_counts()
+        missing_idle = self.min_idle - (idle + self._in_flight)
+        free_capacity = self.max_size - (total + self._in_flight)
+        free_slots = self.refill_concurrency - self._in_flight
+        return max(0, min(missing_idle, free_capacity, free_slots))
+
+    def refill(self):
+        deficit = self.refill_deficit()
+        for _ in range(deficit):
+            self._in_flight += 1
+            task = asyncio.create_task(self._create_one())
+            self._creations.add(task)
+            task.add_done_callback(self._creations.discard)
+        return deficit
+
+    async def _create_one(self):
+        try:
+            ipv4 = await self.dropletManager.create_droplet(priority=PRIORITY_BACKGROUND)
+        except Exception as exc:
+            # Leave the retry to the next periodic check instead of hammering DO.
+            logger.warning("Pool refill failed: %s", exc)
+            return
+        finally:
+            self._in_flight -= 1
+        logger.info("Pool droplet %s provisioned", ipv4)
+        self.request_refill()
+
+    async def _run(self):
+        while True:
+            try:
+                self.refill()
+            except Exception as exc:
+                logger.warning("Pool refill check failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
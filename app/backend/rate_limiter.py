@@ -0,0 +1,153 @@
+"""Client-side budget for the DigitalOcean API rate limit"""
+
+import asyncio
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+from .metrics import DIGITALOCEAN_RATE_LIMIT_DELAYS
+
+load_dotenv()
+
+# Requests that serve a waiting player (session droplet creation and its status polls)
+PRIORITY_PLAYER = 0
+# Everything else: pool refills, reconciliation, reaping and other deletes
+PRIORITY_BACKGROUND = 1
+
+_PRIORITY_NAMES = {PRIORITY_PLAYER: "player", PRIORITY_BACKGROUND: "background"}
+
+_DEFAULT_RATE_LIMIT = int(os.getenv("DIGITALOCEAN_RATE_LIMIT", "5000"))
+_DEFAULT_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("DIGITALOCEAN_RATE_LIMIT_WINDOW_SECONDS", "3600"))
+# Fraction of the budget only player-facing requests may spend
+_DEFAULT_RATE_LIMIT_RESERVE = float(os.getenv("DIGITALOCEAN_RATE_LIMIT_RESERVE", "0.2"))
+# Upper bound on a single wait, so budget restored by response headers is noticed promptly
+_MAX_WAIT_SECONDS = 1.0
+# How often background requests re-check while player-facing requests are queued
+_YIELD_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+def _header_number(headers, name: str):
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimitScheduler:
+    """Token bucket that every DigitalOcean request passes through before it is sent.
+
+    The bucket holds ``limit`` tokens and refills at ``limit / window`` per second.
+    Each response re-syncs it from ``RateLimit-Remaining``, less the requests still
+    in flight, so calls made by other processes with the same token are accounted
+    for. An exhausted budget or a 429 holds every request until ``RateLimit-Reset``
+    or ``Retry-After``, after which the bucket starts full again.
+
+    Player-facing requests may spend the whole bucket. Background requests wait
+    while it is at or below the reserve, or while a player-facing request is
+    queued; they are delayed rather than failed.
+    """
+
+    def __init__(
+        self,
+        limit: int = None,
+        window: float = None,
+        reserve: float = None,
+        clock=time.monotonic,
+        wall_clock=time.time,
+    ):
+        self.limit = _DEFAULT_RATE_LIMIT if limit is None else limit
+        self.window = _DEFAULT_RATE_LIMIT_WINDOW_SECONDS if window is None else window
+        self.reserve = _DEFAULT_RATE_LIMIT_RESERVE if reserve is None else reserve
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.tokens = float(self.limit)
+        self.in_flight = 0
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._waiting_players = 0
+
+    @property
+    def refill_rate(self):
+        return self.limit / self.window
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.limit), self.tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def _try_acquire(self, priority: int):
+        """Take a token and return 0, or return how long to wait before trying again."""
+        now = self._clock()
+        if self._blocked_until:
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            # DigitalOcean restored the budget at the reset; the next response re-syncs it
+            self._blocked_until = 0.0
+            self.tokens = float(self.limit)
+            self._updated = now
+        self._refill(now)
+
+        is_player = priority == PRIORITY_PLAYER
+        if not is_player and self._waiting_players:
+            return _YIELD_SECONDS
+        floor = 0.0 if is_player else self.limit * self.reserve
+        if self.tokens - 1 >= floor:
+            self.tokens -= 1
+            self.in_flight += 1
+            return 0.0
+        return (floor + 1 - self.tokens) / self.refill_rate
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND):
+        wait = self._try_acquire(priority)
+        if not wait:
+            return
+
+        priority_name = _PRIORITY_NAMES.get(priority, str(priority))
+        DIGITALOCEAN_RATE_LIMIT_DELAYS.inc(priority_name)
+        logger.info("Delaying %s DigitalOcean request, %.0f tokens left", priority_name, self.tokens)
+        is_player = priority == PRIORITY_PLAYER
+        if is_player:
+            self._waiting_players += 1
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, _MAX_WAIT_SECONDS))
+                wait = self._try_acquire(priority)
+        finally:
+            if is_player:
+                self._waiting_players -= 1
+
+    def release(self, status_code: int = None, headers=None):
+        """Finish an acquired request and re-sync the bucket from its response headers.
+
+        Call with no response when the request failed before DigitalOcean answered.
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        if headers is None:
+            return
+
+        now = self._clock()
+        self._refill(now)
+        limit = _header_number(headers, "RateLimit-Limit")
+        remaining = _header_number(headers, "RateLimit-Remaining")
+        if limit:
+            self.limit = int(limit)
+        if remaining is not None:
+            self.tokens = max(0.0, min(float(self.limit), remaining - self.in_flight))
+
+        if status_code == 429 or remaining == 0:
+            retry_after = _header_number(headers, "Retry-After")
+            reset = _header_number(headers, "RateLimit-Reset")
+            if retry_after is not None:
+                wait = retry_after
+            elif reset is not None:
+                wait = reset - self._wall_clock()
+            else:
+                # Nothing says when the budget returns; the client's retry backoff spaces the next attempt
+                return
+            wait = max(0.0, wait)
+            self.tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + wait)
+            logger.warning("DigitalOcean rate limit exhausted, holding requests for %.1fs", wait)
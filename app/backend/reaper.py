@@ -0,0 +1,113 @@
+"""Removal of droplets whose game server stopped sending heartbeats"""
+
+import asyncio
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+from .database_manager import DBManager
+from .droplet_manager import DropletManager
+
+load_dotenv()
+
+# Reaper defaults (REAPER_INTERVAL_SECONDS=0 disables the reaper)
+_DEFAULT_REAPER_INTERVAL_SECONDS = float(os.getenv("REAPER_INTERVAL_SECONDS", "60"))
+_DEFAULT_REAPER_STALE_AFTER_SECONDS = float(os.getenv("REAPER_STALE_AFTER_SECONDS", "300"))
+_DEFAULT_REAPER_DELETE_CONCURRENCY = int(os.getenv("REAPER_DELETE_CONCURRENCY", "4"))
+
+logger = logging.getLogger(__name__)
+
+
+class StaleDropletReaper:
+    """Periodically flags droplets with an old ``last_heartbeat`` as unhealthy and deletes them.
+
+    Flagging happens first so matchmaking stops handing the droplet out even while
+    the DigitalOcean delete is still pending or has to be retried on the next sweep.
+    """
+
+    def __init__(
+        self,
+        dbManager: DBManager,
+        dropletManager: DropletManager,
+        interval: float = None,
+        stale_after: float = None,
+        delete_concurrency: int = None,
+    ):
+        self.dbManager = dbManager
+        self.dropletManager = dropletManager
+        self.interval = _DEFAULT_REAPER_INTERVAL_SECONDS if interval is None else interval
+        self.stale_after = stale_after or _DEFAULT_REAPER_STALE_AFTER_SECONDS
+        self.delete_concurrency = max(1, delete_concurrency or _DEFAULT_REAPER_DELETE_CONCURRENCY)
+        self.metrics = {
+            "sweeps": 0,
+            "marked_unhealthy": 0,
+            "deleted": 0,
+            "delete_failures": 0,
+            "last_sweep_seconds": 0.0,
+        }
+        self._loop_task = None
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    @property
+    def running(self):
+        return self._loop_task is not None and not self._loop_task.done()
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(
+            "Stale droplet reaper started (interval=%ss, stale_after=%ss, delete_concurrency=%d)",
+            self.interval, self.stale_after, self.delete_concurrency,
+        )
+
+    async def stop(self):
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        await asyncio.gather(self._loop_task, return_exceptions=True)
+        self._loop_task = None
+
+    async def sweep(self):
+        """Run one reaper pass and return ``(marked, deleted, failed)`` for it."""
+        started = time.monotonic()
+        marked = self.dbManager.mark_stale_droplets(self.stale_after)
+        candidates = self.dbManager.get_unhealthy_droplets()
+
+        semaphore = asyncio.Semaphore(self.delete_concurrency)
+        results = await asyncio.gather(*(self._reap(semaphore, ipv4, droplet_id) for ipv4, droplet_id in candidates))
+        deleted = sum(results)
+        failed = len(results) - deleted
+
+        self.metrics["sweeps"] += 1
+        self.metrics["marked_unhealthy"] += marked
+        self.metrics["deleted"] += deleted
+        self.metrics["delete_failures"] += failed
+        self.metrics["last_sweep_seconds"] = time.monotonic() - started
+        if marked or candidates:
+            logger.info("Reaper sweep: %d marked unhealthy, %d deleted, %d failed", marked, deleted, failed)
+        return marked, deleted, failed
+
+    async def _reap(self, semaphore: asyncio.Semaphore, ipv4: str, droplet_id: int):
+        async with semaphore:
+            try:
+                # Rows without a DigitalOcean droplet (local servers) are only removed from the database.
+                if droplet_id:
+                    await self.dropletManager.delete_droplet(droplet_id, missing_ok=True)
+                self.dbManager.remove_droplet_from_db(ipv4)
+            except Exception as exc:
+                logger.warning("Reaper could not delete droplet %s (%s): %s", droplet_id, ipv4, exc)
+                return False
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as exc:
+                logger.warning("Reaper sweep failed: %s", exc)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,86 @@
+"""Periodic reconciliation of the droplet table with DigitalOcean"""
+
+import asyncio
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+from .droplet_manager import DropletManager
+
+load_dotenv()
+
+# RECONCILE_INTERVAL_SECONDS=0 disables scheduled runs; on-demand runs still work
+_DEFAULT_RECONCILE_INTERVAL_SECONDS = float(os.getenv("RECONCILE_INTERVAL_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+class DropletReconciler:
+    """Runs ``DropletManager.reconcile`` on a schedule and on demand, one run at a time."""
+
+    def __init__(self, dropletManager: DropletManager, interval: float = None):
+        self.dropletManager = dropletManager
+        self.interval = _DEFAULT_RECONCILE_INTERVAL_SECONDS if interval is None else interval
+        self.metrics = {
+            "runs": 0,
+            "failures": 0,
+            "inserted": 0,
+            "updated": 0,
+            "deleted": 0,
+            "last_run_seconds": 0.0,
+        }
+        self._lock = None
+        self._loop_task = None
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    @property
+    def running(self):
+        return self._loop_task is not None and not self._loop_task.done()
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info("Droplet reconciliation started (interval=%ss)", self.interval)
+
+    async def stop(self):
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        await asyncio.gather(self._loop_task, return_exceptions=True)
+        self._loop_task = None
+
+    async def reconcile(self):
+        """Run one reconciliation, waiting for a run already in progress to finish first."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            started = time.monotonic()
+            try:
+                counts = await self.dropletManager.reconcile()
+            except Exception:
+                self.metrics["failures"] += 1
+                raise
+            finally:
+                self.metrics["runs"] += 1
+                self.metrics["last_run_seconds"] = time.monotonic() - started
+            for key, value in counts.items():
+                self.metrics[key] += value
+        if any(counts.values()):
+            logger.info(
+                "Reconciliation: %d inserted, %d updated, %d deleted",
+                counts["inserted"], counts["updated"], counts["deleted"],
+            )
+        return counts
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as exc:
+                logger.warning("Droplet reconciliation failed: %s", exc)
+            await asyncio.sleep(self.interval)
@@ -1,9 +1,11 @@
+import functools
 import hashlib
 import hmac
 import logging
 import os
 import secrets
 import time
+from collections import OrderedDict
 
 from fastapi import Header, HTTPException, Request, status
 
@@ -12,6 +14,10 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_MAX_SKEW_SECONDS = "300"
+# Signatures remembered for replay detection; 0 disables the replay check
+_DEFAULT_REPLAY_CACHE_SIZE = "100000"
+
 
 def _build_hmac_message(method: str, path: str, query: str, timestamp: str, body: bytes) -> str:
     body_hash = hashlib.sha256(body).hexdigest()
@@ -26,64 +32,104 @@ def _get_first_header(request: Request, *header_names: str) -> str | None:
     return None
 
 
+class HmacVerifier:
+    """Verifies internal request signatures and rejects replays of a signed request.
+
+    The key is encoded and absorbed into an HMAC object once; each check only copies it.
+    Accepted signatures are remembered until their timestamp leaves the skew window,
+    in an insertion-ordered cache capped at ``replay_cache_size`` entries. When the cap
+    is hit the oldest entry is dropped, trading a small replay window for bounded memory.
+    """
+
+    def __init__(self, secret: str, max_skew_seconds: int = 300, replay_cache_size: int = 100000):
+        self._hmac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self.max_skew_seconds = max_skew_seconds
+        self.replay_cache_size = replay_cache_size
+        self._seen = OrderedDict()
+
+    def verify(self, method: str, path: str, query: str, timestamp: str | None, signature: str | None, body: bytes, now: float = None):
+        if not timestamp or not signature:
+            logger.warning("Rejected %s %s: missing HMAC headers", method, path)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature.")
+
+        try:
+            timestamp_value = int(timestamp)
+        except ValueError as exc:
+            logger.warning("Rejected %s %s: invalid HMAC timestamp", method, path)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature.") from exc
+
+        now = time.time() if now is None else now
+        if abs(int(now) - timestamp_value) > self.max_skew_seconds:
+            logger.warning("Rejected %s %s: stale HMAC timestamp", method, path)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Stale HMAC signature.")
+
+        mac = self._hmac.copy()
+        mac.update(_build_hmac_message(method, path, query, timestamp, body).encode("utf-8"))
+        expected_signature = mac.hexdigest()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("HMAC check %s %s: expected %s, received %s", method, path, expected_signature, signature)
+        if not secrets.compare_digest(signature, expected_signature):
+            logger.warning("Rejected %s %s: HMAC signature mismatch", method, path)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature.")
+
+        if self.replay_cache_size > 0 and not self._remember(expected_signature, timestamp_value + self.max_skew_seconds, now):
+            logger.warning("Rejected %s %s: replayed HMAC signature", method, path)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Replayed HMAC signature.")
+
+    def _remember(self, signature: str, expires_at: float, now: float):
+        """Record ``signature``; returns False if it was already seen and has not expired."""
+        previous = self._seen.get(signature)
+        if previous is not None and previous >= now:
+            return False
+        self._seen[signature] = expires_at
+        self._seen.move_to_end(signature)
+
+        # Expire from the front, then enforce the size bound
+        while self._seen:
+            oldest_signature, oldest_expiry = next(iter(self._seen.items()))
+            if oldest_expiry >= now and len(self._seen) <= self.replay_cache_size:
+                break
+            del self._seen[oldest_signature]
+        return True
+
+
+@functools.lru_cache(maxsize=1)
+def _build_verifier(secret: str, max_skew_seconds: str, replay_cache_size: str):
+    return HmacVerifier(secret, int(max_skew_seconds), int(replay_cache_size))
+
+
+def get_hmac_verifier() -> HmacVerifier | None:
+    """Return the verifier for the current environment, or None when no secret is configured.
+
+    The verifier (and its replay cache) is rebuilt only when the configuration changes.
+    """
+    hmac_secret = os.getenv("INTERNAL_HMAC_KEY") or os.getenv("INTERNAL_HMAC_SECRET")
+    if not hmac_secret:
+        return None
+    return _build_verifier(
+        hmac_secret,
+        os.getenv("INTERNAL_HMAC_MAX_SKEW_SECONDS", _DEFAULT_MAX_SKEW_SECONDS),
+        os.getenv("INTERNAL_HMAC_REPLAY_CACHE_SIZE", _DEFAULT_REPLAY_CACHE_SIZE),
+    )
+
+
 async def require_internal_hmac(
     request: Request,
     timestamp: str | None = Header(default=None, alias="Request-Timestamp"),
     signature: str | None = Header(default=None, alias="Request-Signature"),
 ):
-    # DEBUG: Log that request arrived
-    logger.info(f"[SECURITY DEBUG] Request received: {request.method} {request.url.path}")
-    logger.debug(f"[SECURITY DEBUG] All headers: {dict(request.headers)}")
-    
-    timestamp = timestamp or _get_first_header(request, "Request-Timestamp")
-    signature = signature or _get_first_header(request, "Request-Signature")
-    
-    logger.debug(f"[SECURITY DEBUG] Extracted timestamp: {timestamp}")
-    logger.debug(f"[SECURITY DEBUG] Extracted signature: {signature}")
-
-    hmac_secret = os.getenv("INTERNAL_HMAC_KEY") or os.getenv("INTERNAL_HMAC_SECRET")
-    if not hmac_secret:
+    verifier = get_hmac_verifier()
+    if verifier is None:
         logger.error("INTERNAL_HMAC_KEY / INTERNAL_HMAC_SECRET is not configured for internal endpoints")
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Internal endpoint unavailable.")
 
-    if not timestamp or not signature:
-        logger.warning(f"[SECURITY DEBUG] Missing headers - timestamp: {bool(timestamp)}, signature: {bool(signature)}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature.")
-
-    try:
-        timestamp_value = int(timestamp)
-        logger.debug(f"[SECURITY DEBUG] Parsed timestamp value: {timestamp_value}")
-    except ValueError as exc:
-        logger.warning(f"[SECURITY DEBUG] Invalid timestamp format: {timestamp}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature.") from exc
-
-    max_skew_seconds = int(os.getenv("INTERNAL_HMAC_MAX_SKEW_SECONDS", "300"))
-    current_time = int(time.time())
-    time_diff = abs(current_time - timestamp_value)
-    logger.debug(f"[SECURITY DEBUG] Time check - current: {current_time}, request: {timestamp_value}, diff: {time_diff}s, max: {max_skew_seconds}s")
-    
-    if time_diff > max_skew_seconds:
-        logger.warning(f"[SECURITY DEBUG] Stale timestamp - diff: {time_diff}s exceeds max: {max_skew_seconds}s")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Stale HMAC signature.")
-
-    request_body = await request.body()
-    logger.debug(f"[SECURITY DEBUG] Request body length: {len(request_body)} bytes")
-    
-    message = _build_hmac_message(
+    timestamp = timestamp or _get_first_header(request, "Request-Timestamp")
+    signature = signature or _get_first_header(request, "Request-Signature")
+    verifier.verify(
         request.method,
         request.url.path,
         request.url.query,
         timestamp,
-        request_body,
+        signature,
+        await request.body(),
     )
-    logger.debug(f"[SECURITY DEBUG] HMAC message built:\n{message}")
-    
-    expected_signature = hmac.new(hmac_secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
-    logger.debug(f"[SECURITY DEBUG] Expected signature: {expected_signature}")
-    logger.debug(f"[SECURITY DEBUG] Received signature: {signature}")
-    
-    if not secrets.compare_digest(signature, expected_signature):
-        logger.warning(f"[SECURITY DEBUG] Signature mismatch!")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature.")
-    
-    logger.info(f"[SECURITY DEBUG] ✓ HMAC validation successful for {request.method} {request.url.path}")
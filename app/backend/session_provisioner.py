@@ -0,0 +1,54 @@
+"""Background provisioning of droplets for new game sessions"""
+
+import asyncio
+import logging
+
+from .constants import SESSION_STATE_FAILED, SESSION_STATE_PROVISIONING
+from .database_manager import DBManager
+from .droplet_manager import DropletManager, _get_public_ipv4
+
+logger = logging.getLogger(__name__)
+
+
+class SessionProvisioner:
+    """Hands out a share tag immediately and provisions its droplet in the background.
+
+    Progress is persisted in ``provisioning_sessions`` so ``/sessions/{share_tag}/status``
+    can report it; once the droplet is active the share tag moves to ``game_droplets``.
+    """
+
+    def __init__(self, dbManager: DBManager, dropletManager: DropletManager):
+        self.dbManager = dbManager
+        self.dropletManager = dropletManager
+        self._tasks = set()
+
+    def start_session(self):
+        share_tag = self.dbManager.create_provisioning_session()
+        task = asyncio.create_task(self._provision(share_tag))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return share_tag
+
+    async def _provision(self, share_tag: str):
+        droplet_id = None
+        try:
+            droplet_id = await self.dropletManager.request_droplet()
+            self.dbManager.update_provisioning_session(share_tag, SESSION_STATE_PROVISIONING, droplet_id=droplet_id)
+            droplet = await self.dropletManager.wait_until_active(droplet_id)
+            ipv4 = _get_public_ipv4(droplet)
+            self.dbManager.assign_droplet_to_session(share_tag, ipv4, droplet_id)
+            logger.info("Session %s is ready on droplet %s (%s)", share_tag, droplet_id, ipv4)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Provisioning for session %s failed: %s", share_tag, exc)
+            self.dbManager.update_provisioning_session(share_tag, SESSION_STATE_FAILED, error=str(exc))
+            if droplet_id:
+                await self.dropletManager.discard_droplet(droplet_id)
+
+    async def stop(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,116 @@
+"""Numbered schema migrations
+
+Each migration runs once, in order, inside its own write transaction and is
+recorded in ``schema_migrations``. New schema changes are appended to
+``MIGRATIONS`` with the next version number; applied migrations are never edited.
+"""
+
+import sqlite3
+
+
+def _add_missing_column(cur: sqlite3.Cursor, table: str, column: str, definition: str):
+    columns = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _baseline(cur: sqlite3.Cursor):
+    # Databases created by the old one-shot setup script already have some of
+    # this, so everything here tolerates existing objects.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS game_droplets (
+        ipv4 TEXT PRIMARY KEY,
+        connected_clients INTEGER NOT NULL DEFAULT 0,
+        fresh_game INTEGER GENERATED ALWAYS AS (CASE WHEN connected_clients <= 0 THEN 1 ELSE 0 END) STORED,
+        last_heartbeat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        droplet_id INT NOT NULL DEFAULT 0,
+        share_tag TEXT UNIQUE,
+        reserved_until TIMESTAMP,
+        healthy INTEGER NOT NULL DEFAULT 1
+    )
+    """)
+    _add_missing_column(cur, "game_droplets", "reserved_until", "TIMESTAMP")
+    _add_missing_column(cur, "game_droplets", "healthy", "INTEGER NOT NULL DEFAULT 1")
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS set_share_tag_after_insert
+    AFTER INSERT ON game_droplets
+    FOR EACH ROW
+    WHEN NEW.share_tag IS NULL
+    BEGIN
+        UPDATE game_droplets
+        SET share_tag = substr(hex(randomblob(3)), 1, 6)
+        WHERE rowid = NEW.rowid;
+    END;
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS provisioning_sessions (
+        share_tag TEXT PRIMARY KEY,
+        droplet_id INT NOT NULL DEFAULT 0,
+        state TEXT NOT NULL DEFAULT 'provisioning',
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _index_free_droplets(cur: sqlite3.Cursor):
+    # Partial index over idle, healthy rows only, already in last_heartbeat order,
+    # so the free-droplet lookup neither scans busy droplets nor sorts.
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_game_droplets_free
+    ON game_droplets (last_heartbeat, reserved_until)
+    WHERE fresh_game = 1 AND healthy = 1
+    """)
+
+
+def _index_heartbeat_age(cur: sqlite3.Cursor):
+    # Deliberately not partial: a "WHERE healthy = 1" index would compete with
+    # idx_game_droplets_free for the free-droplet query.
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_game_droplets_heartbeat_age
+    ON game_droplets (last_heartbeat)
+    """)
+
+
+MIGRATIONS = [
+    (1, "baseline", _baseline),
+    (2, "index_free_droplets", _index_free_droplets),
+    (3, "index_heartbeat_age", _index_heartbeat_age),
+]
+
+
+def schema_version(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection):
+    """Apply all pending migrations and return the versions that were applied."""
+    applied = []
+    for version, name, apply in MIGRATIONS:
+        if version <= schema_version(conn):
+            continue
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the write lock
+            if cur.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                cur.execute("COMMIT")
+                continue
+            apply(cur)
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+        applied.append(version)
+    return applied
@@ -22,8 +22,8 @@ if [ "$ENFORCE_HTTPS" = "true" ]; then
         exit 1
     fi
     echo "Starting API with TLS enabled"
-    exec python -m uvicorn api:app --host 0.0.0.0 --port 8000 --ssl-certfile "$SSL_CERTFILE" --ssl-keyfile "$SSL_KEYFILE"
+    exec python -m uvicorn api:app --host 0.0.0.0 --port 8000 --no-access-log --ssl-certfile "$SSL_CERTFILE" --ssl-keyfile "$SSL_KEYFILE"
 else
     echo "Starting API without TLS (HTTP only)"
-    exec python -m uvicorn api:app --host 0.0.0.0 --port 8000
+    exec python -m uvicorn api:app --host 0.0.0.0 --port 8000 --no-access-log
 fi
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Microbenchmark of DBManager operations per second.
+
+Usage:
+    python benchmarks/bench_database_manager.py [--seconds 1.0] [--droplets 200]
+
+Creates a throw-away database with the production schema, seeds it with
+droplets and reports single-threaded ops/sec for each DBManager method, plus
+heartbeat throughput while reader threads hammer the share-tag lookup.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.backend.database_manager import DBManager
+
+
+def _create_database(path: str):
+    env = dict(os.environ, DB_PATH=path)
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "app", "db", "database_setup.py")],
+        env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def _ops_per_second(operation, seconds: float):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            operation()
+        count += 50
+    return count / seconds
+
+
+def _seed(manager: DBManager, droplets: int):
+    manager.update_db_with_droplets([
+        {"id": i + 1, "networks": {"v4": [{"ip_address": f"10.2.{i // 256}.{i % 256}"}]}}
+        for i in range(droplets)
+    ])
+
+
+def _contended_heartbeats(manager: DBManager, ips: list, share_tag: str, seconds: float, readers: int):
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            manager.get_ipv4_by_share_tag(share_tag)
+
+    threads = [threading.Thread(target=reader, daemon=True) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    cycle = itertools.cycle(ips)
+    try:
+        return _ops_per_second(lambda: manager.update_or_insert_game_droplet(next(cycle), 1), seconds)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="duration per method")
+    parser.add_argument("--droplets", type=int, default=200, help="rows seeded before measuring")
+    parser.add_argument("--readers", type=int, default=4, help="reader threads in the contended run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        _create_database(db_path)
+        manager = DBManager(db_path)
+        _seed(manager, args.droplets)
+
+        ips = [f"10.2.{i // 256}.{i % 256}" for i in range(args.droplets)]
+        share_tag = manager.get_share_tag_by_ipv4(ips[0])
+        cycle = itertools.cycle(ips)
+        operations = {
+            "update_or_insert_game_droplet": lambda: manager.update_or_insert_game_droplet(next(cycle), 1),
+            "get_ipv4_by_share_tag": lambda: manager.get_ipv4_by_share_tag(share_tag),
+            "get_share_tag_by_ipv4": lambda: manager.get_share_tag_by_ipv4(ips[0]),
+            "get_droplet_id": lambda: manager.get_droplet_id(ips[0]),
+            "get_droplets_without_player": manager.get_droplets_without_player,
+            "get_pool_counts": manager.get_pool_counts,
+            "claim_free_droplet": manager.claim_free_droplet,
+        }
+        results = {name: round(_ops_per_second(operation, args.seconds)) for name, operation in operations.items()}
+        results["update_or_insert_game_droplet (with readers)"] = round(
+            _contended_heartbeats(manager, ips, share_tag, args.seconds, args.readers)
+        )
+        if hasattr(manager, "close"):
+            manager.close()
+
+    width = max(len(name) for name in results)
+    for name, ops in results.items():
+        print(f"{name:<{width}}  {ops:>10,} ops/s")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
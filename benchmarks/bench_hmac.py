@@ -0,0 +1,79 @@
+"""Microbenchmark of internal HMAC verifications per second.
+
+Usage:
+    python benchmarks/bench_hmac.py [--requests 50000] [--body-bytes 64]
+
+Signs a set of distinct heartbeat-sized requests up front, then measures how
+many of them can be verified per second by the per-call approach the API used
+before HmacVerifier (environment lookups, key encoding and a fresh HMAC for
+every request) and by HmacVerifier with and without the replay cache.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.backend.security import HmacVerifier, _build_hmac_message
+
+_SECRET = "bench-internal-hmac-secret"
+
+
+def _signed_requests(count: int, body_bytes: int):
+    timestamp = str(int(time.time()))
+    body = b"x" * body_bytes
+    requests = []
+    for i in range(count):
+        path = f"/server/heartbeat/{i}"
+        message = _build_hmac_message("POST", path, "", timestamp, body)
+        signature = hmac.new(_SECRET.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+        requests.append(("POST", path, "", timestamp, signature, body))
+    return requests
+
+
+def _per_call_verify(method, path, query, timestamp, signature, body):
+    secret = os.getenv("BENCH_HMAC_KEY") or os.getenv("BENCH_HMAC_SECRET") or _SECRET
+    max_skew_seconds = int(os.getenv("BENCH_HMAC_MAX_SKEW_SECONDS", "300"))
+    if abs(int(time.time()) - int(timestamp)) > max_skew_seconds:
+        raise ValueError("stale")
+    message = _build_hmac_message(method, path, query, timestamp, body)
+    expected = hmac.new(secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(signature, expected):
+        raise ValueError("mismatch")
+
+
+def _verifications_per_second(verify, requests):
+    started = time.perf_counter()
+    for request in requests:
+        verify(*request)
+    return len(requests) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50000, help="distinct signed requests to verify")
+    parser.add_argument("--body-bytes", type=int, default=64, help="request body size")
+    args = parser.parse_args()
+
+    requests = _signed_requests(args.requests, args.body_bytes)
+    variants = {
+        "per-call (env + key encode)": _per_call_verify,
+        "HmacVerifier (no replay cache)": HmacVerifier(_SECRET, replay_cache_size=0).verify,
+        "HmacVerifier (replay cache)": HmacVerifier(_SECRET, replay_cache_size=args.requests).verify,
+    }
+    results = {name: round(_verifications_per_second(verify, requests)) for name, verify in variants.items()}
+
+    width = max(len(name) for name in results)
+    for name, ops in results.items():
+        print(f"{name:<{width}}  {ops:>10,} verifications/s")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Local stand-in for the DigitalOcean v2 droplets API.
+
+Usage:
+    python benchmarks/fake_digitalocean.py [--port 8081] [--provisioning-delay 30]
+        [--latency-ms 80] [--latency-jitter-ms 30] [--error-rate 0.01]
+        [--rate-limit 5000] [--rate-limit-window 3600]
+
+Then start the orchestrator with DIGITALOCEAN_API_BASE=http://127.0.0.1:8081/v2.
+
+Serves the endpoints the orchestrator uses: create, get, delete, list by tag
+with pagination, and droplet actions. New droplets report ``new`` until the
+provisioning delay has passed. Latency, injected 500 errors and the
+``RateLimit-*`` headers (429 once the window's budget is spent) can be tuned to
+benchmark provisioning, pooling and reaping offline. Tests use ``app`` in
+process through ``httpx.ASGITransport``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+_DEFAULT_PAGE_SIZE = 20
+_MAX_PAGE_SIZE = 200
+_DROPLET_ACTIONS = {"power_on": "active", "power_off": "off", "shutdown": "off", "reboot": "active", "power_cycle": "active"}
+
+
+class FakeDigitalOcean:
+    def __init__(
+        self,
+        provisioning_delay: float = 0.0,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: int = 5000,
+        rate_limit_window: float = 3600.0,
+    ):
+        self.provisioning_delay = provisioning_delay
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.droplets = {}
+        self.actions = {}
+        self.request_count = 0
+        self._ids = itertools.count(100000)
+        self._ips = itertools.count(1)
+        self._window_started = time.time()
+        self._window_requests = 0
+        self.app = self._build_app()
+
+    def add_droplet(self, tags=(), active: bool = True, **attributes):
+        """Create a droplet directly, bypassing latency, errors and rate limits."""
+        droplet_id = next(self._ids)
+        address = next(self._ips)
+        droplet = {
+            "id": droplet_id,
+            "name": attributes.get("name") or f"droplet-{droplet_id}",
+            "region": {"slug": attributes.get("region") or "nyc3"},
+            "size_slug": attributes.get("size") or "s-1vcpu-1gb",
+            "image": {"id": attributes.get("image")},
+            "tags": list(tags),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "status": "new",
+            "networks": {"v4": []},
+            "_active_at": time.monotonic() + (0 if active else self.provisioning_delay),
+            "_ipv4": f"10.{address // 65536 % 256}.{address // 256 % 256}.{address % 256}",
+        }
+        self.droplets[droplet_id] = droplet
+        return self._public(droplet)
+
+    def _public(self, droplet: dict):
+        if droplet["status"] == "new" and time.monotonic() >= droplet["_active_at"]:
+            droplet["status"] = "active"
+            droplet["networks"] = {"v4": [
+                {"ip_address": droplet["_ipv4"], "type": "public"},
+                {"ip_address": f"10.200.{droplet['id'] % 65536 // 256}.{droplet['id'] % 256}", "type": "private"},
+            ]}
+        return {key: value for key, value in droplet.items() if not key.startswith("_")}
+
+    def _rate_limit_headers(self):
+        now = time.time()
+        if now - self._window_started >= self.rate_limit_window:
+            self._window_started = now
+            self._window_requests = 0
+        self._window_requests += 1
+        return {
+            "RateLimit-Limit": str(self.rate_limit),
+            "RateLimit-Remaining": str(max(0, self.rate_limit - self._window_requests)),
+            "RateLimit-Reset": str(int(self._window_started + self.rate_limit_window)),
+        }
+
+    def _build_app(self):
+        app = FastAPI(title="Fake DigitalOcean API")
+
+        @app.middleware("http")
+        async def simulate_network(request: Request, call_next):
+            self.request_count += 1
+            if self.latency_ms or self.latency_jitter_ms:
+                delay_ms = random.gauss(self.latency_ms, self.latency_jitter_ms) if self.latency_jitter_ms else self.latency_ms
+                await asyncio.sleep(max(0.0, delay_ms) / 1000)
+
+            headers = self._rate_limit_headers()
+            if not request.headers.get("Authorization", "").startswith("Bearer "):
+                response = JSONResponse({"id": "unauthorized", "message": "Unable to authenticate you."}, status_code=401)
+            elif self._window_requests > self.rate_limit:
+                headers["Retry-After"] = str(max(1, int(self._window_started + self.rate_limit_window - time.time())))
+                response = JSONResponse({"id": "too_many_requests", "message": "API Rate limit exceeded."}, status_code=429)
+            elif self.error_rate and random.random() < self.error_rate:
+                response = JSONResponse({"id": "server_error", "message": "Injected failure."}, status_code=500)
+            else:
+                response = await call_next(request)
+            response.headers.update(headers)
+            return response
+
+        def not_found():
+            return JSONResponse(
+                {"id": "not_found", "message": "The resource you were accessing could not be found."},
+                status_code=404,
+            )
+
+        @app.post("/v2/droplets")
+        async def create_droplet(request: Request):
+            body = await request.json()
+            droplet = self.add_droplet(
+                tags=body.get("tags", []),
+                active=False,
+                name=body.get("name"),
+                region=body.get("region"),
+                size=body.get("size"),
+                image=body.get("image"),
+            )
+            return JSONResponse({"droplet": droplet}, status_code=202)
+
+        @app.get("/v2/droplets")
+        async def list_droplets(request: Request, tag_name: str = None, page: int = 1, per_page: int = _DEFAULT_PAGE_SIZE):
+            per_page = max(1, min(per_page, _MAX_PAGE_SIZE))
+            matching = [
+                droplet for droplet in self.droplets.values()
+                if tag_name is None or tag_name in droplet["tags"]
+            ]
+            start = (page - 1) * per_page
+            droplets = [self._public(droplet) for droplet in matching[start:start + per_page]]
+
+            pages = {}
+            if start + per_page < len(matching):
+                query = f"page={page + 1}&per_page={per_page}" + (f"&tag_name={tag_name}" if tag_name else "")
+                pages["next"] = f"{str(request.base_url).rstrip('/')}/v2/droplets?{query}"
+            return {"droplets": droplets, "links": {"pages": pages}, "meta": {"total": len(matching)}}
+
+        @app.get("/v2/droplets/{droplet_id}")
+        async def get_droplet(droplet_id: int):
+            droplet = self.droplets.get(droplet_id)
+            if droplet is None:
+                return not_found()
+            return {"droplet": self._public(droplet)}
+
+        @app.delete("/v2/droplets/{droplet_id}")
+        async def delete_droplet(droplet_id: int):
+            if self.droplets.pop(droplet_id, None) is None:
+                return not_found()
+            return Response(status_code=204)
+
+        @app.post("/v2/droplets/{droplet_id}/actions")
+        async def droplet_action(droplet_id: int, request: Request):
+            droplet = self.droplets.get(droplet_id)
+            if droplet is None:
+                return not_found()
+            action_type = (await request.json()).get("type")
+            if action_type not in _DROPLET_ACTIONS:
+                return JSONResponse({"id": "unprocessable_entity", "message": "Invalid action type."}, status_code=422)
+
+            self._public(droplet)
+            if droplet["status"] != "new":
+                droplet["status"] = _DROPLET_ACTIONS[action_type]
+            action = {
+                "id": next(self._ids),
+                "status": "completed",
+                "type": action_type,
+                "resource_id": droplet_id,
+                "resource_type": "droplet",
+            }
+            self.actions[action["id"]] = action
+            return JSONResponse({"action": action}, status_code=201)
+
+        @app.get("/v2/actions/{action_id}")
+        async def get_action(action_id: int):
+            action = self.actions.get(action_id)
+            if action is None:
+                return not_found()
+            return {"action": action}
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--provisioning-delay", type=float, default=0.0, help="seconds until a new droplet is active")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added latency per request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="standard deviation of the added latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="requests allowed per window")
+    parser.add_argument("--rate-limit-window", type=float, default=3600.0, help="rate limit window in seconds")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = FakeDigitalOcean(
+        provisioning_delay=args.provisioning_delay,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+    )
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
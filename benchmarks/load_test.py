@@ -0,0 +1,320 @@
+"""End-to-end load test of the orchestrator API.
+
+Usage:
+    python benchmarks/load_test.py [--base-url http://127.0.0.1:8000] [--duration 30]
+        [--servers 200] [--heartbeat-interval 5] [--player-rate 20]
+        [--burst-every 10] [--burst-seconds 2] [--burst-factor 10]
+        [--party-size 4] [--session-seconds 15] [--concurrency 256]
+        [--output results.json] [--spawn]
+
+Simulates a fleet of game servers and bursty players against a running API:
+
+- every game server registers through ``/server/heartbeat`` and keeps sending
+  heartbeats at a fixed interval, reporting its player count
+- players arrive as a Poisson process whose rate is multiplied by
+  ``--burst-factor`` for ``--burst-seconds`` out of every ``--burst-every``
+  seconds. Each arrival calls ``/sessions/start``, and the rest of the party
+  then calls ``/sessions/join`` with the returned share tag
+- when a session ends, its server calls ``/server/end`` and registers again
+  as a fresh server
+
+Internal requests are HMAC-signed like ``scripts/test_heartbeat.py`` does,
+with ``INTERNAL_HMAC_KEY``. ``--spawn`` starts the API on a throw-away
+database, with the DigitalOcean simulator behind it, so runs need no setup
+and stay comparable across commits. Throughput and p50/p95/p99 latency per
+endpoint are printed and written as JSON.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from test_heartbeat import sign_request
+
+_ENDPOINTS = ("/sessions/start", "/sessions/join", "/server/heartbeat", "/server/end")
+
+
+def _percentile(sorted_values: list, fraction: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.latencies = {endpoint: [] for endpoint in _ENDPOINTS}
+        self.statuses = {endpoint: {} for endpoint in _ENDPOINTS}
+
+    def record(self, endpoint: str, seconds: float, status: str):
+        self.latencies[endpoint].append(seconds)
+        counts = self.statuses[endpoint]
+        counts[status] = counts.get(status, 0) + 1
+
+    def _summary(self, latencies: list, statuses: dict, elapsed: float):
+        latencies = sorted(latencies)
+        errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": ms(_percentile(latencies, 0.50)),
+            "p95_ms": ms(_percentile(latencies, 0.95)),
+            "p99_ms": ms(_percentile(latencies, 0.99)),
+            "max_ms": ms(latencies[-1] if latencies else None),
+            "status_counts": dict(sorted(statuses.items())),
+        }
+
+    def summary(self, elapsed: float):
+        endpoints = {
+            endpoint: self._summary(self.latencies[endpoint], self.statuses[endpoint], elapsed)
+            for endpoint in _ENDPOINTS
+        }
+        all_statuses = {}
+        for statuses in self.statuses.values():
+            for status, count in statuses.items():
+                all_statuses[status] = all_statuses.get(status, 0) + count
+        total = self._summary([value for values in self.latencies.values() for value in values], all_statuses, elapsed)
+        return endpoints, total
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, hmac_key: str, args):
+        self.client = client
+        self.hmac_key = hmac_key
+        self.args = args
+        self.recorder = LatencyRecorder()
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        # droplet ip -> connected clients reported in the next heartbeat
+        self.servers = {f"10.250.{i // 250}.{i % 250 + 1}": 0 for i in range(args.servers)}
+        self.session_ends = {}
+        self.players = 0
+        self._tasks = set()
+
+    async def _request(self, endpoint: str, path: str, params: dict = None, payload: dict = None, signed: bool = False):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8") if payload is not None else b""
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        if signed:
+            query = str(httpx.QueryParams(params)) if params else ""
+            headers.update(sign_request(self.hmac_key, "POST", path, query, body))
+
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(path, params=params, content=body, headers=headers)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                response, status = None, type(exc).__name__
+            self.recorder.record(endpoint, time.perf_counter() - started, status)
+        return response
+
+    async def _heartbeat(self, droplet_ip: str):
+        payload = {"droplet_ip": droplet_ip, "connected_clients": self.servers[droplet_ip]}
+        await self._request("/server/heartbeat", "/server/heartbeat", payload=payload, signed=True)
+
+    async def run_server(self, droplet_ip: str, deadline: float):
+        # Spread the fleet over one interval so heartbeats do not arrive in lockstep
+        await asyncio.sleep(random.uniform(0, self.args.heartbeat_interval))
+        while time.monotonic() < deadline:
+            ends_at = self.session_ends.get(droplet_ip)
+            if ends_at is not None and time.monotonic() >= ends_at:
+                del self.session_ends[droplet_ip]
+                self.servers[droplet_ip] = 0
+                await self._request("/server/end", "/server/end", params={"droplet_ip": droplet_ip}, signed=True)
+            # Scheduled from the heartbeat itself, so two identical heartbeats are never signed in the same second
+            next_beat = time.monotonic() + self.args.heartbeat_interval
+            await self._heartbeat(droplet_ip)
+            await asyncio.sleep(max(0.0, next_beat - time.monotonic()))
+
+    async def _player_party(self):
+        response = await self._request("/sessions/start", "/sessions/start")
+        if response is None or response.status_code != 200:
+            return
+        session = response.json()
+        droplet_ip, share_tag = session.get("ip_address"), session.get("share_tag")
+        party = random.randint(1, self.args.party_size)
+        self.players += party
+        if droplet_ip in self.servers:
+            self.servers[droplet_ip] = party
+            # Reported with the server's next heartbeat; the claim lease covers the gap
+            self.session_ends[droplet_ip] = time.monotonic() + random.expovariate(1 / self.args.session_seconds)
+        if share_tag and droplet_ip:
+            await asyncio.gather(*(
+                self._request("/sessions/join", "/sessions/join", params={"game_tag": share_tag})
+                for _ in range(party - 1)
+            ))
+
+    def _arrival_rate(self, elapsed: float):
+        in_burst = self.args.burst_every > 0 and elapsed % self.args.burst_every < self.args.burst_seconds
+        return self.args.player_rate * (self.args.burst_factor if in_burst else 1)
+
+    async def run_players(self, started: float, deadline: float):
+        while True:
+            now = time.monotonic()
+            rate = self._arrival_rate(now - started)
+            wait = random.expovariate(rate) if rate > 0 else 0.1
+            if now + wait >= deadline:
+                break
+            await asyncio.sleep(wait)
+            if rate > 0:
+                task = asyncio.create_task(self._player_party())
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def run(self):
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        await asyncio.gather(
+            self.run_players(started, deadline),
+            *(self.run_server(droplet_ip, deadline) for droplet_ip in self.servers),
+        )
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        return time.monotonic() - started
+
+
+def _free_port():
+    with contextlib.closing(socket.socket()) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+@contextlib.contextmanager
+def _spawned_api(hmac_key: str):
+    """Run the DigitalOcean simulator and the API on a throw-away database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_port, api_port = _free_port(), _free_port()
+        env = dict(
+            os.environ,
+            DB_PATH=os.path.join(tmp, "load_test.db"),
+            DIGITALOCEAN_TOKEN=os.getenv("DIGITALOCEAN_TOKEN", "load-test"),
+            DIGITALOCEAN_API_BASE=f"http://127.0.0.1:{fake_port}/v2",
+            INTERNAL_HMAC_KEY=hmac_key,
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        )
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "app", "db", "database_setup.py")],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        processes = []
+        try:
+            fake = subprocess.Popen(
+                [sys.executable, os.path.join(ROOT, "benchmarks", "fake_digitalocean.py"), "--port", str(fake_port)],
+                env=env,
+            )
+            processes.append(fake)
+            _wait_until_up(f"http://127.0.0.1:{fake_port}/docs", fake)
+            api = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(api_port), "--no-access-log"],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+            )
+            processes.append(api)
+            _wait_until_up(f"http://127.0.0.1:{api_port}/", api)
+            yield f"http://127.0.0.1:{api_port}"
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=10)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run(base_url: str, hmac_key: str, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        load_test = LoadTest(client, hmac_key, args)
+        elapsed = await load_test.run()
+    endpoints, total = load_test.recorder.summary(elapsed)
+    return {
+        "commit": _git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "base_url")},
+        "elapsed_seconds": round(elapsed, 3),
+        "players": load_test.players,
+        "endpoints": endpoints,
+        "total": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--servers", type=int, default=200, help="simulated game servers")
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0, help="seconds between heartbeats per server")
+    parser.add_argument("--player-rate", type=float, default=20.0, help="mean party arrivals per second outside bursts")
+    parser.add_argument("--burst-every", type=float, default=10.0, help="seconds between the starts of bursts, 0 for none")
+    parser.add_argument("--burst-seconds", type=float, default=2.0, help="length of each burst")
+    parser.add_argument("--burst-factor", type=float, default=10.0, help="arrival rate multiplier during a burst")
+    parser.add_argument("--party-size", type=int, default=4, help="largest party; all but the host join by share tag")
+    parser.add_argument("--session-seconds", type=float, default=15.0, help="mean session length")
+    parser.add_argument("--concurrency", type=int, default=256, help="maximum requests in flight")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--spawn", action="store_true", help="start a throw-away API and DigitalOcean simulator")
+    args = parser.parse_args()
+
+    if args.heartbeat_interval < 1:
+        # Identical heartbeats signed within the same second would be rejected as replays
+        parser.error("--heartbeat-interval must be at least 1 second")
+    hmac_key = os.getenv("INTERNAL_HMAC_KEY") or os.getenv("INTERNAL_HMAC_SECRET")
+    if not hmac_key and not args.spawn:
+        parser.error("INTERNAL_HMAC_KEY is not set")
+    hmac_key = hmac_key or "load-test-hmac-key"
+
+    if args.spawn:
+        with _spawned_api(hmac_key) as base_url:
+            results = asyncio.run(_run(base_url, hmac_key, args))
+    else:
+        results = asyncio.run(_run(args.base_url, hmac_key, args))
+
+    print(f"{'endpoint':<20} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, summary in list(results["endpoints"].items()) + [("total", results["total"])]:
+        print(
+            f"{name:<20} {summary['requests']:>9} {summary['errors']:>7} {summary['throughput_rps']:>9}"
+            f" {summary['p50_ms'] or '-':>9} {summary['p95_ms'] or '-':>9} {summary['p99_ms'] or '-':>9}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,12 +11,14 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from fastapi.testclient import TestClient
 from app import api
+from app.backend.security import _build_verifier
 
 
 class TestApi(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(api.app)
         self.internal_hmac_secret = "test-internal-hmac-secret"
+        _build_verifier.cache_clear()
 
     def _create_hmac_headers(self, method: str, path: str, query: str = "", body: bytes = b"", timestamp: int | None = None):
         current_timestamp = int(time.time()) if timestamp is None else int(timestamp)
@@ -34,7 +36,7 @@ class TestApi(unittest.TestCase):
         }
 
     def test_start_game_session_reuses_existing_droplet(self):
-        with patch.object(api.databaseManager, "get_droplets_without_player", return_value=("10.0.0.1", "ABC123")):
+        with patch.object(api.databaseManager, "claim_free_droplet", return_value=("10.0.0.1", "ABC123")):
             response = self.client.post("/sessions/start")
 
         self.assertEqual(response.status_code, 200)
@@ -44,14 +46,14 @@ class TestApi(unittest.TestCase):
                 "message": "Reusing existing droplet",
                 "ip_address": "10.0.0.1",
                 "share_tag": "ABC123",
+                "state": "ready",
             },
         )
 
-    def test_start_game_session_creates_new_droplet(self):
+    def test_start_game_session_provisions_new_droplet(self):
         with (
-            patch.object(api.databaseManager, "get_droplets_without_player", return_value=(None, None)),
-            patch.object(api.dropletManager, "create_droplet", new=AsyncMock(return_value="10.0.0.9")),
-            patch.object(api.databaseManager, "get_share_tag_by_ipv4", return_value="NEWTAG"),
+            patch.object(api.databaseManager, "claim_free_droplet", return_value=(None, None)),
+            patch.object(api.sessionProvisioner, "start_session", return_value="NEWTAG") as mock_start,
         ):
             response = self.client.post("/sessions/start")
 
@@ -59,10 +61,66 @@ class TestApi(unittest.TestCase):
         self.assertEqual(
             response.json(),
             {
-                "ip_address": "10.0.0.9",
+                "message": "Provisioning new droplet",
                 "share_tag": "NEWTAG",
+                "state": "provisioning",
             },
         )
+        mock_start.assert_called_once()
+
+    def test_requests_are_logged_by_route_template(self):
+        with (
+            patch.object(api.databaseManager, "get_session_status", return_value=None),
+            self.assertLogs("app.requests", level="INFO") as logs,
+        ):
+            self.client.get("/sessions/NOPE42/status")
+
+        record = logs.records[0]
+        self.assertEqual(record.route, "/sessions/{share_tag}/status")
+        self.assertEqual(record.path, "/sessions/NOPE42/status")
+        self.assertEqual(record.status, 404)
+        self.assertGreaterEqual(record.duration_ms, 0)
+
+    def test_metrics_endpoint_exposes_prometheus_text(self):
+        counts = {"fresh": 2, "occupied": 1, "provisioning": 0, "stale": 0}
+        with patch.object(api.databaseManager, "get_droplet_state_counts", return_value=counts):
+            self.client.get("/")
+            response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn('orchestrator_droplets{state="fresh"} 2', response.text)
+        self.assertIn(
+            'orchestrator_http_request_duration_seconds_count{route="/",method="GET",status="200"}',
+            response.text,
+        )
+
+    def test_session_status_ready(self):
+        with patch.object(api.databaseManager, "get_session_status", return_value=("ready", "10.0.0.9", None)):
+            response = self.client.get("/sessions/NEWTAG/status")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"share_tag": "NEWTAG", "state": "ready", "ip_address": "10.0.0.9"},
+        )
+
+    def test_session_status_failed(self):
+        with patch.object(api.databaseManager, "get_session_status", return_value=("failed", None, "boom")):
+            response = self.client.get("/sessions/NEWTAG/status")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"share_tag": "NEWTAG", "state": "failed", "error": "boom"},
+        )
+
+    def test_session_status_unknown(self):
+        with patch.object(api.databaseManager, "get_session_status", return_value=None):
+            response = self.client.get("/sessions/MISSING/status")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Game session not found."})
 
     def test_login_game_session_success(self):
         with patch.object(api.databaseManager, "get_ipv4_by_share_tag", return_value="10.0.0.2"):
@@ -84,7 +142,7 @@ class TestApi(unittest.TestCase):
         with (
             patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False),
             patch.object(api.databaseManager, "get_droplet_id", return_value=77),
-            patch.object(api.dropletManager, "delete_droplet", return_value={"message": "ok"}),
+            patch.object(api.dropletManager, "delete_droplet", new=AsyncMock(return_value={"message": "ok"})),
             patch.object(api.databaseManager, "remove_droplet_from_db", return_value=True),
         ):
             response = self.client.post(
@@ -120,7 +178,7 @@ class TestApi(unittest.TestCase):
             patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False),
             patch.object(api.databaseManager, "get_droplet_id", return_value=0),
             patch.object(api.databaseManager, "remove_droplet_from_db", return_value=True),
-            patch.object(api.dropletManager, "delete_droplet") as mock_delete,
+            patch.object(api.dropletManager, "delete_droplet", new=AsyncMock()) as mock_delete,
         ):
             response = self.client.post(
                 "/server/end",
@@ -133,7 +191,7 @@ class TestApi(unittest.TestCase):
             response.json(),
             {"message": "Game session ended and local session entry removed (no DigitalOcean droplet)."},
         )
-        mock_delete.assert_not_called()
+        mock_delete.assert_not_awaited()
 
     def test_server_heartbeat_success(self):
         payload = {"droplet_ip": "10.0.0.4", "connected_clients": 10}
@@ -176,6 +234,93 @@ class TestApi(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.json(), {"detail": "Droplet not found in database."})
 
+    def test_server_heartbeat_batch_reports_status_per_entry(self):
+        payload = [
+            {"droplet_ip": "10.0.0.4", "connected_clients": 1},
+            {"droplet_ip": "10.0.0.6", "connected_clients": 0},
+            {"droplet_ip": "not-an-ip", "connected_clients": 0},
+            {"droplet_ip": "10.0.0.7", "connected_clients": -1},
+        ]
+        payload_body = json.dumps(payload).encode("utf-8")
+        headers = self._create_hmac_headers("POST", "/server/heartbeat/batch", body=payload_body)
+        headers["Content-Type"] = "application/json"
+        with (
+            patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False),
+            patch.object(api.databaseManager, "update_or_insert_game_droplets", return_value={"10.0.0.6"}) as mock_write,
+        ):
+            response = self.client.post(
+                "/server/heartbeat/batch",
+                content=payload_body,
+                headers=headers,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "message": "Heartbeat batch processed.",
+                "results": [
+                    {"droplet_ip": "10.0.0.4", "status": "updated"},
+                    {"droplet_ip": "10.0.0.6", "status": "created"},
+                    {"droplet_ip": "not-an-ip", "status": "invalid"},
+                    {"droplet_ip": "10.0.0.7", "status": "invalid"},
+                ],
+            },
+        )
+        mock_write.assert_called_once()
+        self.assertEqual(dict(mock_write.call_args.args[0]), {"10.0.0.4": 1, "10.0.0.6": 0})
+
+    def test_server_heartbeat_batch_rejects_oversized_batch(self):
+        payload = [{"droplet_ip": "10.0.0.4", "connected_clients": 1}] * 3
+        payload_body = json.dumps(payload).encode("utf-8")
+        headers = self._create_hmac_headers("POST", "/server/heartbeat/batch", body=payload_body)
+        headers["Content-Type"] = "application/json"
+        with (
+            patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False),
+            patch.object(api, "_HEARTBEAT_BATCH_MAX_ENTRIES", 2),
+            patch.object(api.databaseManager, "update_or_insert_game_droplets") as mock_write,
+        ):
+            response = self.client.post(
+                "/server/heartbeat/batch",
+                content=payload_body,
+                headers=headers,
+            )
+
+        self.assertEqual(response.status_code, 413)
+        mock_write.assert_not_called()
+
+    def test_server_heartbeat_batch_requires_hmac(self):
+        with patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False):
+            response = self.client.post(
+                "/server/heartbeat/batch",
+                json=[{"droplet_ip": "10.0.0.5", "connected_clients": 10}],
+            )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"detail": "Invalid HMAC signature."})
+
+    def test_reconcile_returns_counts(self):
+        headers = self._create_hmac_headers("POST", "/server/reconcile")
+        counts = {"inserted": 2, "updated": 1, "deleted": 3}
+        with (
+            patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False),
+            patch.object(api.dropletManager, "reconcile", new=AsyncMock(return_value=counts)),
+        ):
+            response = self.client.post("/server/reconcile", headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"message": "Droplet reconciliation completed.", **counts})
+
+    def test_reconcile_requires_hmac(self):
+        with (
+            patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False),
+            patch.object(api.dropletManager, "reconcile", new=AsyncMock()) as mock_reconcile,
+        ):
+            response = self.client.post("/server/reconcile")
+
+        self.assertEqual(response.status_code, 401)
+        mock_reconcile.assert_not_awaited()
+
     def test_end_game_session_requires_hmac(self):
         with patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.internal_hmac_secret}, clear=False):
             response = self.client.post("/server/end", params={"droplet_ip": "10.0.0.33"})
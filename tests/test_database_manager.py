@@ -2,11 +2,15 @@ import os
 import sqlite3
 import sys
 import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.backend.database_manager import DBManager
+from app.db.migrations import migrate
 
 
 class TestDBManager(unittest.TestCase):
@@ -19,38 +23,14 @@ class TestDBManager(unittest.TestCase):
         self.db_manager = DBManager(self.db_path)
 
     def tearDown(self):
-        if os.path.exists(self.db_path):
-            os.unlink(self.db_path)
+        self.db_manager.close()
+        for path in (self.db_path, f"{self.db_path}-wal", f"{self.db_path}-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
 
     def _create_schema(self, db_path):
         conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS game_droplets (
-                ipv4 TEXT PRIMARY KEY,
-                connected_clients INTEGER NOT NULL DEFAULT 0,
-                fresh_game INTEGER GENERATED ALWAYS AS (CASE WHEN connected_clients <= 0 THEN 1 ELSE 0 END) STORED,
-                last_heartbeat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                droplet_id INT NOT NULL DEFAULT 0,
-                share_tag TEXT UNIQUE
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS set_share_tag_after_insert
-            AFTER INSERT ON game_droplets
-            FOR EACH ROW
-            WHEN NEW.share_tag IS NULL
-            BEGIN
-                UPDATE game_droplets
-                SET share_tag = substr(hex(randomblob(3)), 1, 6)
-                WHERE rowid = NEW.rowid;
-            END;
-            """
-        )
-        conn.commit()
+        migrate(conn)
         conn.close()
 
     def _seed_multiple_entries(self):
@@ -81,6 +61,310 @@ class TestDBManager(unittest.TestCase):
 
         self.assertIn((ipv4, share_tag), [("10.0.0.1", "TAG101"), ("10.0.0.3", "TAG103")])
 
+    def test_claim_free_droplet_empty_db(self):
+        self.assertEqual(self.db_manager.claim_free_droplet(), (None, None))
+
+    def test_claim_free_droplet_reserves_droplet(self):
+        self._seed_multiple_entries()
+
+        first = self.db_manager.claim_free_droplet()
+        second = self.db_manager.claim_free_droplet()
+        third = self.db_manager.claim_free_droplet()
+
+        self.assertEqual(
+            sorted([first, second]),
+            [("10.0.0.1", "TAG101"), ("10.0.0.3", "TAG103")],
+        )
+        self.assertEqual(third, (None, None))
+        self.assertEqual(self.db_manager.get_droplets_without_player(), (None, None))
+
+    def test_claim_free_droplet_expired_lease_is_reclaimable(self):
+        self.db_manager.update_or_insert_game_droplet("10.0.3.1", 0)
+
+        claimed = self.db_manager.claim_free_droplet(lease_seconds=-1)
+        reclaimed = self.db_manager.claim_free_droplet()
+
+        self.assertEqual(claimed[0], "10.0.3.1")
+        self.assertEqual(reclaimed, claimed)
+
+    def test_heartbeat_with_clients_confirms_reservation(self):
+        self.db_manager.update_or_insert_game_droplet("10.0.3.2", 0)
+        self.db_manager.claim_free_droplet()
+
+        self.db_manager.update_or_insert_game_droplet("10.0.3.2", 1)
+
+        conn = sqlite3.connect(self.db_path)
+        cur = conn.cursor()
+        cur.execute("SELECT reserved_until FROM game_droplets WHERE ipv4 = ?", ("10.0.3.2",))
+        row = cur.fetchone()
+        conn.close()
+
+        self.assertIsNone(row[0])
+
+    def _age_heartbeat(self, ipv4, seconds):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "UPDATE game_droplets SET last_heartbeat = datetime('now', ?) WHERE ipv4 = ?",
+            (f"-{seconds} seconds", ipv4),
+        )
+        conn.commit()
+        conn.close()
+
+    def test_stale_droplets_are_marked_unhealthy_and_skipped(self):
+        self._seed_multiple_entries()
+        self._age_heartbeat("10.0.0.1", 600)
+        self._age_heartbeat("10.0.0.2", 600)
+
+        marked = self.db_manager.mark_stale_droplets(300)
+
+        self.assertEqual(marked, 2)
+        self.assertEqual(self.db_manager.mark_stale_droplets(300), 0)
+        self.assertEqual(
+            sorted(self.db_manager.get_unhealthy_droplets()),
+            [("10.0.0.1", 101), ("10.0.0.2", 102)],
+        )
+        self.assertEqual(self.db_manager.get_pool_counts(), (1, 3))
+        self.assertEqual(self.db_manager.claim_free_droplet(), ("10.0.0.3", "TAG103"))
+        self.assertEqual(self.db_manager.claim_free_droplet(), (None, None))
+
+    def test_heartbeat_restores_health(self):
+        self.db_manager.update_or_insert_game_droplet("10.0.3.3", 0)
+        self._age_heartbeat("10.0.3.3", 600)
+        self.db_manager.mark_stale_droplets(300)
+
+        self.db_manager.update_or_insert_game_droplet("10.0.3.3", 0)
+
+        self.assertEqual(self.db_manager.get_unhealthy_droplets(), [])
+        self.assertEqual(self.db_manager.claim_free_droplet()[0], "10.0.3.3")
+
+    def test_reserve_droplet_returns_share_tag(self):
+        self._seed_multiple_entries()
+
+        self.assertEqual(self.db_manager.reserve_droplet("10.0.0.1"), "TAG101")
+        self.assertEqual(self.db_manager.claim_free_droplet(), ("10.0.0.3", "TAG103"))
+        self.assertIsNone(self.db_manager.reserve_droplet("10.9.9.9"))
+
+    def test_concurrent_claims_never_double_assign(self):
+        free_droplets = 100
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            "INSERT INTO game_droplets (ipv4, droplet_id) VALUES (?, ?)",
+            [(f"10.1.{i // 256}.{i % 256}", i + 1) for i in range(free_droplets)],
+        )
+        conn.commit()
+        conn.close()
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(lambda _: self.db_manager.claim_free_droplet(), range(300)))
+
+        claimed = [result for result in results if result[0] is not None]
+        self.assertEqual(len(claimed), free_droplets)
+        self.assertEqual(len({ipv4 for ipv4, _ in claimed}), free_droplets)
+        self.assertEqual(len({share_tag for _, share_tag in claimed}), free_droplets)
+
+    def test_provisioning_session_lifecycle(self):
+        share_tag = self.db_manager.create_provisioning_session()
+
+        self.assertRegex(share_tag, r"^[0-9A-F]{6}$")
+        self.assertEqual(self.db_manager.get_session_status(share_tag), ("provisioning", None, None))
+
+        self.assertTrue(self.db_manager.update_provisioning_session(share_tag, "provisioning", droplet_id=42))
+        self.db_manager.assign_droplet_to_session(share_tag, "10.0.4.1", 42)
+
+        self.assertEqual(self.db_manager.get_session_status(share_tag), ("ready", "10.0.4.1", None))
+        self.assertEqual(self.db_manager.get_droplet_id("10.0.4.1"), 42)
+        self.assertEqual(self.db_manager.get_ipv4_by_share_tag(share_tag), "10.0.4.1")
+        self.assertEqual(self.db_manager.claim_free_droplet(), (None, None))
+
+    def test_failed_provisioning_session_reports_error(self):
+        share_tag = self.db_manager.create_provisioning_session()
+
+        self.db_manager.update_provisioning_session(share_tag, "failed", error="no capacity")
+
+        self.assertEqual(self.db_manager.get_session_status(share_tag), ("failed", None, "no capacity"))
+        self.assertIsNone(self.db_manager.get_session_status("MISSING"))
+
+    def test_connection_is_reused_per_thread_in_wal_mode(self):
+        conn = self.db_manager._connection()
+
+        self.assertIs(self.db_manager._connection(), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(self.db_manager._connection).result()
+        self.assertIsNot(other, conn)
+
+    def test_reader_is_not_blocked_by_open_write_transaction(self):
+        self._seed_multiple_entries()
+        self.db_manager._connection()
+        writer = sqlite3.connect(self.db_path, isolation_level=None)
+        writer.execute("BEGIN EXCLUSIVE")
+        writer.execute("UPDATE game_droplets SET connected_clients = 5 WHERE ipv4 = ?", ("10.0.0.1",))
+        try:
+            self.assertEqual(self.db_manager.get_ipv4_by_share_tag("TAG101"), "10.0.0.1")
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+    def test_failed_transaction_is_rolled_back(self):
+        with self.assertRaises(KeyError):
+            self.db_manager.update_db_with_droplets([
+                {"id": 301, "networks": {"v4": [{"ip_address": "10.0.6.1"}]}},
+                {"id": 302},
+            ])
+
+        self.assertIsNone(self.db_manager.get_droplet_id("10.0.6.1"))
+        self.assertEqual(self.db_manager.claim_free_droplet(), (None, None))
+
+    def _delete_rows_behind_manager(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM game_droplets")
+        conn.commit()
+        conn.close()
+
+    def test_lookups_are_served_from_index(self):
+        self._seed_multiple_entries()
+        self.db_manager.load_index()
+        self._delete_rows_behind_manager()
+
+        self.assertEqual(self.db_manager.get_ipv4_by_share_tag("TAG102"), "10.0.0.2")
+        self.assertEqual(self.db_manager.get_droplet_id("10.0.0.3"), 103)
+        self.assertEqual(self.db_manager.get_share_tag_by_ipv4("10.0.0.1"), "TAG101")
+
+    def test_index_tracks_mutations(self):
+        self.db_manager.load_index()
+        self.db_manager.update_db_with_droplets([{"id": 401, "networks": {"v4": [{"ip_address": "10.0.7.1"}]}}])
+        self.db_manager.update_or_insert_game_droplet("10.0.7.2", 0)
+        self.db_manager._add_droplet_to_db("10.0.7.3")
+
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT ipv4, droplet_id, share_tag FROM game_droplets").fetchall()
+        conn.close()
+        self.assertEqual(len(rows), 3)
+        for ipv4, droplet_id, share_tag in rows:
+            self.assertRegex(share_tag, r"^[0-9A-F]{6}$")
+            self.assertEqual(self.db_manager.get_ipv4_by_share_tag(share_tag), ipv4)
+            self.assertEqual(self.db_manager.get_droplet_id(ipv4), droplet_id)
+
+        share_tag = self.db_manager.get_share_tag_by_ipv4("10.0.7.1")
+        self.assertTrue(self.db_manager.remove_droplet_from_db("10.0.7.1"))
+        self.assertIsNone(self.db_manager.get_droplet_id("10.0.7.1"))
+        self.assertIsNone(self.db_manager.get_ipv4_by_share_tag(share_tag))
+
+    def test_index_falls_back_to_database_for_external_rows(self):
+        self.db_manager.load_index()
+        self._seed_multiple_entries()
+
+        self.assertEqual(self.db_manager.get_ipv4_by_share_tag("TAG101"), "10.0.0.1")
+        self.assertEqual(self.db_manager.get_droplet_id("10.0.0.2"), 102)
+
+    def test_unknown_share_tags_are_negatively_cached(self):
+        self.db_manager.load_index()
+        self.assertIsNone(self.db_manager.get_ipv4_by_share_tag("TAG101"))
+
+        self._seed_multiple_entries()
+
+        self.assertIsNone(self.db_manager.get_ipv4_by_share_tag("TAG101"))
+        with patch("app.backend.database_manager._NEGATIVE_CACHE_TTL_SECONDS", -1):
+            self.db_manager._remember_missing_tag("TAG101")
+        self.assertEqual(self.db_manager.get_ipv4_by_share_tag("TAG101"), "10.0.0.1")
+
+    def test_new_share_tag_clears_negative_cache(self):
+        share_tag = self.db_manager.create_provisioning_session()
+        self.assertIsNone(self.db_manager.get_ipv4_by_share_tag(share_tag))
+
+        self.db_manager.assign_droplet_to_session(share_tag, "10.0.8.1", 801)
+
+        self.assertEqual(self.db_manager.get_ipv4_by_share_tag(share_tag), "10.0.8.1")
+
+    def test_negative_cache_is_bounded(self):
+        with patch("app.backend.database_manager._NEGATIVE_CACHE_SIZE", 3):
+            for i in range(10):
+                self.db_manager.get_ipv4_by_share_tag(f"BAD{i:03}")
+
+        self.assertEqual(list(self.db_manager._missing_tags), ["BAD007", "BAD008", "BAD009"])
+
+    def test_update_or_insert_game_droplets_in_one_transaction(self):
+        self._seed_multiple_entries()
+        self.db_manager.load_index()
+
+        created = self.db_manager.update_or_insert_game_droplets([("10.0.0.1", 3), ("10.0.9.9", 0)])
+
+        self.assertEqual(created, {"10.0.9.9"})
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT ipv4, connected_clients FROM game_droplets ORDER BY ipv4").fetchall()
+        conn.close()
+        self.assertEqual(rows, [("10.0.0.1", 3), ("10.0.0.2", 2), ("10.0.0.3", 0), ("10.0.9.9", 0)])
+        share_tag = self.db_manager.get_share_tag_by_ipv4("10.0.9.9")
+        self.assertEqual(self.db_manager.get_ipv4_by_share_tag(share_tag), "10.0.9.9")
+        self.assertEqual(self.db_manager.update_or_insert_game_droplets([]), set())
+
+    def test_update_or_insert_game_droplets_reports_created_without_index(self):
+        self._seed_multiple_entries()
+
+        created = self.db_manager.update_or_insert_game_droplets([("10.0.0.2", 0), ("10.0.9.8", 1)])
+
+        self.assertEqual(created, {"10.0.9.8"})
+
+    def test_update_or_insert_game_droplets_retries_share_tag_collision(self):
+        self.db_manager.load_index()
+        self._seed_multiple_entries()
+        tags = iter(["TAG101", "FRESH1", "FRESH2"])
+
+        with patch("app.backend.database_manager._new_share_tag", side_effect=lambda: next(tags)):
+            created = self.db_manager.update_or_insert_game_droplets([("10.0.9.7", 0)])
+
+        self.assertEqual(created, {"10.0.9.7"})
+        self.assertEqual(self.db_manager.get_share_tag_by_ipv4("10.0.9.7"), "FRESH1")
+
+    def test_reconcile_droplets_applies_only_the_difference(self):
+        self._seed_multiple_entries()
+        self.db_manager.update_or_insert_game_droplet("127.0.0.1", 0)
+        listed_since = time.time() + 1
+
+        counts = self.db_manager.reconcile_droplets(
+            {"10.0.0.1": 101, "10.0.0.2": 202, "10.0.0.4": 104},
+            listed_since=listed_since,
+        )
+
+        self.assertEqual(counts, {"inserted": 1, "updated": 1, "deleted": 1})
+        self.assertEqual(self.db_manager.get_droplet_id("10.0.0.2"), 202)
+        self.assertEqual(self.db_manager.get_droplet_id("10.0.0.4"), 104)
+        self.assertIsNone(self.db_manager.get_droplet_id("10.0.0.3"))
+        self.assertIsNone(self.db_manager.get_ipv4_by_share_tag("TAG103"))
+        # Local rows without a DigitalOcean droplet are kept
+        self.assertIsNotNone(self.db_manager.get_share_tag_by_ipv4("127.0.0.1"))
+        self.assertEqual(
+            self.db_manager.reconcile_droplets({"10.0.0.1": 101, "10.0.0.2": 202, "10.0.0.4": 104}, listed_since),
+            {"inserted": 0, "updated": 0, "deleted": 0},
+        )
+
+    def test_reconcile_droplets_keeps_rows_written_during_listing(self):
+        listed_since = time.time() - 60
+        self.db_manager.update_db_with_droplets([{"id": 500, "networks": {"v4": [{"ip_address": "10.0.5.0"}]}}])
+
+        counts = self.db_manager.reconcile_droplets({}, listed_since=listed_since)
+
+        self.assertEqual(counts["deleted"], 0)
+        self.assertEqual(self.db_manager.get_droplet_id("10.0.5.0"), 500)
+
+    def test_reconcile_droplets_handles_large_fleet(self):
+        droplet_ids = {f"10.1.{i // 250}.{i % 250}": 1000 + i for i in range(1500)}
+
+        self.assertEqual(self.db_manager.reconcile_droplets(droplet_ids)["inserted"], 1500)
+
+        droplet_ids.pop("10.1.0.0")
+        droplet_ids["10.1.0.1"] = 99999
+        counts = self.db_manager.reconcile_droplets(droplet_ids, listed_since=time.time() + 1)
+
+        self.assertEqual(counts, {"inserted": 0, "updated": 1, "deleted": 1})
+
+    def test_get_pool_counts(self):
+        self.assertEqual(self.db_manager.get_pool_counts(), (0, 0))
+
+        self._seed_multiple_entries()
+
+        self.assertEqual(self.db_manager.get_pool_counts(), (2, 3))
+
     def test_update_or_insert_game_droplet_insert_and_update(self):
         inserted = self.db_manager.update_or_insert_game_droplet("10.0.1.1", 0)
         updated = self.db_manager.update_or_insert_game_droplet("10.0.1.1", 4)
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.digitalocean_client import DigitalOceanClient
+
+
+class TestDigitalOceanClient(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.responses = []
+
+        def handler(request):
+            self.requests.append(request)
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.client = DigitalOceanClient(
+            "test-token",
+            transport=httpx.MockTransport(handler),
+            max_retries=2,
+            backoff_base=0,
+        )
+
+    def _request(self, *args, **kwargs):
+        async def run():
+            try:
+                return await self.client.request(*args, **kwargs)
+            finally:
+                await self.client.aclose()
+
+        return asyncio.run(run())
+
+    def test_retries_server_errors_until_success(self):
+        self.responses.extend([httpx.Response(503), httpx.Response(502), httpx.Response(200, json={})])
+
+        response = self._request("GET", "/droplets")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_returns_last_response_when_retries_are_exhausted(self):
+        self.responses.extend([httpx.Response(500), httpx.Response(500), httpx.Response(500)])
+
+        response = self._request("GET", "/droplets")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_does_not_retry_client_errors(self):
+        self.responses.append(httpx.Response(404))
+
+        response = self._request("GET", "/droplets/1")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_non_idempotent_request_is_not_retried_on_server_error(self):
+        self.responses.append(httpx.Response(500))
+
+        response = self._request("POST", "/droplets", json={}, idempotent=False)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_non_idempotent_request_is_retried_on_rate_limit_and_connect_error(self):
+        self.responses.extend([
+            httpx.Response(429),
+            httpx.ConnectError("refused"),
+            httpx.Response(202, json={}),
+        ])
+
+        response = self._request("POST", "/droplets", json={}, idempotent=False)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_non_idempotent_request_is_not_retried_on_read_timeout(self):
+        self.responses.append(httpx.ReadTimeout("timed out"))
+
+        with self.assertRaises(httpx.ReadTimeout):
+            self._request("POST", "/droplets", json={}, idempotent=False)
+
+        self.assertEqual(len(self.requests), 1)
+
+    def test_transport_errors_are_raised_after_retries(self):
+        self.responses.extend([httpx.ConnectError("refused")] * 3)
+
+        with self.assertRaises(httpx.ConnectError):
+            self._request("GET", "/droplets")
+
+        self.assertEqual(len(self.requests), 3)
+
+    def test_backoff_delay_is_jittered_and_capped(self):
+        client = DigitalOceanClient("test-token", backoff_base=1, backoff_max=4)
+
+        with patch("app.backend.digitalocean_client.random.uniform", side_effect=lambda low, high: high) as uniform:
+            delays = [client._backoff_delay(attempt) for attempt in range(5)]
+
+        self.assertEqual(delays, [1, 2, 4, 4, 4])
+        uniform.assert_called_with(0, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,35 +1,83 @@
+import asyncio
+import json
 import unittest
 from unittest.mock import MagicMock, patch
 import os
 import sys
 
+import httpx
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from app.backend.digitalocean_client import DigitalOceanClient
 from app.backend.droplet_manager import DropletManager
 
 
 class TestDropletManager(unittest.TestCase):
     def setUp(self):
         self.db_manager = MagicMock()
-        self.manager = DropletManager(self.db_manager, token="test-token")
+        self.requests = []
+        self.responses = []
+
+        def handler(request):
+            self.requests.append(request)
+            return self.responses.pop(0)
+
+        client = DigitalOceanClient("test-token", transport=httpx.MockTransport(handler), max_retries=0)
+        self.manager = DropletManager(self.db_manager, token="test-token", client=client)
+
+    def _run(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await self.manager.close()
+
+        return asyncio.run(run())
 
-    @patch("app.backend.droplet_manager.requests.get")
-    def test_fetch_tagged_droplets_updates_database(self, mock_get):
+    def test_fetch_tagged_droplets_updates_database(self):
         droplets = [{"id": 1, "networks": {"v4": [{"ip_address": "10.0.0.1"}]}}]
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"droplets": droplets}
-        mock_get.return_value = mock_response
+        self.responses.append(httpx.Response(200, json={"droplets": droplets}))
 
-        result = self.manager._fetch_tagged_droplets()
+        result = self._run(self.manager._fetch_tagged_droplets())
 
         self.assertEqual(result, droplets)
         self.db_manager.update_db_with_droplets.assert_called_once_with(droplets)
+        self.assertEqual(self.requests[0].url.params["tag_name"], self.manager.droplet_tag)
+        self.assertEqual(self.requests[0].headers["Authorization"], "Bearer test-token")
+
+    def test_list_tagged_droplets_follows_pagination(self):
+        first_page = [{"id": 1, "networks": {"v4": [{"ip_address": "10.0.0.1", "type": "public"}]}}]
+        second_page = [{"id": 2, "networks": {"v4": [{"ip_address": "10.0.0.2", "type": "public"}]}}]
+        next_link = "https://api.digitalocean.com/v2/droplets?page=2&per_page=200&tag_name=femquest-server"
+        self.responses.append(httpx.Response(200, json={"droplets": first_page, "links": {"pages": {"next": next_link}}}))
+        self.responses.append(httpx.Response(200, json={"droplets": second_page, "links": {}}))
+
+        result = self._run(self.manager.list_tagged_droplets())
+
+        self.assertEqual(result, first_page + second_page)
+        self.assertEqual([request.url.params["page"] for request in self.requests], ["1", "2"])
+        self.assertEqual(self.requests[1].url.params["tag_name"], self.manager.droplet_tag)
+
+    def test_reconcile_passes_public_ips_to_database(self):
+        droplets = [
+            {"id": 1, "networks": {"v4": [{"ip_address": "10.10.0.1", "type": "private"}, {"ip_address": "10.0.0.1", "type": "public"}]}},
+            {"id": 2, "networks": {"v4": []}},
+        ]
+        self.responses.append(httpx.Response(200, json={"droplets": droplets}))
+        self.db_manager.reconcile_droplets.return_value = {"inserted": 1, "updated": 0, "deleted": 0}
+
+        result = self._run(self.manager.reconcile())
+
+        self.assertEqual(result, {"inserted": 1, "updated": 0, "deleted": 0})
+        args, kwargs = self.db_manager.reconcile_droplets.call_args
+        self.assertEqual(args[0], {"10.0.0.1": 1})
+        self.assertIn("listed_since", kwargs)
 
     def test_get_droplet_id_returns_from_db(self):
         self.db_manager.get_droplet_id.return_value = 55
 
-        result = self.manager.get_droplet_id("10.0.0.55")
+        result = self._run(self.manager.get_droplet_id("10.0.0.55"))
 
         self.assertEqual(result, 55)
         self.db_manager.get_droplet_id.assert_called_once_with("10.0.0.55")
@@ -41,45 +89,82 @@ class TestDropletManager(unittest.TestCase):
             "_fetch_tagged_droplets",
             return_value=[{"id": 88, "networks": {"v4": [{"ip_address": "10.0.0.88"}]}}],
         ) as mock_fetch:
-            result = self.manager.get_droplet_id("10.0.0.88")
+            result = self._run(self.manager.get_droplet_id("10.0.0.88"))
 
         self.assertEqual(result, 88)
-        mock_fetch.assert_called_once()
+        mock_fetch.assert_awaited_once()
 
-    @patch("app.backend.droplet_manager.requests.delete")
-    def test_delete_droplet_success(self, mock_delete):
-        mock_response = MagicMock()
-        mock_response.status_code = 204
-        mock_delete.return_value = mock_response
+    def test_delete_droplet_success(self):
+        self.responses.append(httpx.Response(204))
 
-        result = self.manager.delete_droplet(99)
+        result = self._run(self.manager.delete_droplet(99))
 
         self.assertEqual(result, {"message": "Droplet 99 deleted successfully."})
+        self.assertEqual(self.requests[0].method, "DELETE")
+        self.assertEqual(self.requests[0].url.path, "/v2/droplets/99")
 
-    @patch("app.backend.droplet_manager.requests.post")
-    def test_create_droplet_updates_database(self, mock_post):
-        new_droplet = {
-            "id": 777,
-            "networks": {"v4": [{"ip_address": "10.0.7.7"}]}
-        }
-        mock_create_response = MagicMock()
-        mock_create_response.status_code = 202
-        mock_create_response.json.return_value = {"droplet": new_droplet}
+    def test_delete_droplet_failure(self):
+        self.responses.append(httpx.Response(404, json={"id": "not_found"}))
 
-        mock_ip_response = MagicMock()
-        mock_ip_response.status_code = 200
-        mock_ip_response.json.return_value = {"ip_address": "10.0.7.7"}
+        with self.assertRaises(Exception):
+            self._run(self.manager.delete_droplet(99))
 
-        mock_post.side_effect = [mock_create_response, mock_ip_response]
+    def test_delete_droplet_missing_ok(self):
+        self.responses.append(httpx.Response(404, json={"id": "not_found"}))
 
-        async def run_create():
-            return await self.manager.create_droplet()
+        result = self._run(self.manager.delete_droplet(99, missing_ok=True))
+
+        self.assertEqual(result, {"message": "Droplet 99 was already deleted."})
+
+    def test_create_droplet_waits_until_active_and_updates_database(self):
+        new_droplet = {"id": 777, "status": "new", "networks": {"v4": []}}
+        active_droplet = {
+            "id": 777,
+            "status": "active",
+            "networks": {"v4": [
+                {"ip_address": "10.10.0.7", "type": "private"},
+                {"ip_address": "10.0.7.7", "type": "public"},
+            ]},
+        }
+        self.responses.append(httpx.Response(202, json={"droplet": new_droplet}))
+        self.responses.append(httpx.Response(200, json={"droplet": new_droplet}))
+        self.responses.append(httpx.Response(200, json={"droplet": active_droplet}))
 
-        import asyncio
-        result = asyncio.run(run_create())
+        with patch("app.backend.droplet_manager._DEFAULT_POLL_INTERVAL_SECONDS", 0):
+            result = self._run(self.manager.create_droplet())
 
         self.assertEqual(result, "10.0.7.7")
-        self.db_manager.update_db_with_droplets.assert_called_once_with([new_droplet])
+        self.db_manager.update_db_with_droplets.assert_called_once_with([active_droplet])
+        self.assertEqual(json.loads(self.requests[0].content)["tags"], [self.manager.droplet_tag])
+        self.assertEqual([request.method for request in self.requests], ["POST", "GET", "GET"])
+        self.assertEqual(self.requests[1].url.path, "/v2/droplets/777")
+
+    def test_create_droplet_discards_droplet_that_never_becomes_active(self):
+        new_droplet = {"id": 778, "status": "new", "networks": {"v4": []}}
+        self.responses.append(httpx.Response(202, json={"droplet": new_droplet}))
+        self.responses.append(httpx.Response(200, json={"droplet": new_droplet}))
+        self.responses.append(httpx.Response(204))
+
+        with (
+            patch("app.backend.droplet_manager._DEFAULT_ACTIVE_TIMEOUT_SECONDS", 0),
+            self.assertRaises(TimeoutError),
+        ):
+            self._run(self.manager.create_droplet())
+
+        self.assertEqual(self.requests[-1].method, "DELETE")
+        self.assertEqual(self.requests[-1].url.path, "/v2/droplets/778")
+        self.db_manager.update_db_with_droplets.assert_not_called()
+
+    def test_connections_are_reused_across_calls(self):
+        self.responses.extend([httpx.Response(204), httpx.Response(204)])
+
+        async def run():
+            await self.manager.delete_droplet(1)
+            first_client = self.manager.client._client
+            await self.manager.delete_droplet(2)
+            return first_client is self.manager.client._client
+
+        self.assertTrue(self._run(run()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.digitalocean_client import DigitalOceanClient
+from app.backend.droplet_manager import DropletManager
+from app.backend.rate_limiter import PRIORITY_PLAYER
+from benchmarks.fake_digitalocean import FakeDigitalOcean
+
+
+class TestFakeDigitalOcean(unittest.TestCase):
+    """DropletManager end to end against the in-process DigitalOcean simulator."""
+
+    def setUp(self):
+        self.db_manager = MagicMock()
+
+    def _manager(self, fake: FakeDigitalOcean, **client_options):
+        client = DigitalOceanClient(
+            "test-token",
+            base_url="http://fake-digitalocean/v2",
+            transport=httpx.ASGITransport(app=fake.app),
+            **client_options,
+        )
+        return DropletManager(self.db_manager, token="test-token", client=client)
+
+    def _run(self, manager: DropletManager, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await manager.close()
+
+        return asyncio.run(run())
+
+    def test_create_droplet_waits_for_provisioning(self):
+        fake = FakeDigitalOcean(provisioning_delay=0.05)
+        manager = self._manager(fake)
+
+        async def create():
+            droplet_id = await manager.request_droplet()
+            droplet = await manager.wait_until_active(droplet_id, poll_interval=0.02, timeout=5)
+            return droplet_id, droplet
+
+        droplet_id, droplet = self._run(manager, create())
+
+        self.assertEqual(droplet["status"], "active")
+        self.assertEqual(fake.droplets[droplet_id]["tags"], [manager.droplet_tag])
+        self.assertGreater(fake.request_count, 2)
+
+    def test_list_tagged_droplets_across_pages(self):
+        fake = FakeDigitalOcean()
+        manager = self._manager(fake)
+        for _ in range(450):
+            fake.add_droplet(tags=[manager.droplet_tag])
+        fake.add_droplet(tags=["other"])
+
+        droplets = self._run(manager, manager.list_tagged_droplets())
+
+        self.assertEqual(len(droplets), 450)
+        self.assertEqual(len({droplet["id"] for droplet in droplets}), 450)
+        self.assertEqual(fake.request_count, 3)
+
+    def test_delete_droplet_then_missing(self):
+        fake = FakeDigitalOcean()
+        manager = self._manager(fake)
+        droplet_id = fake.add_droplet(tags=[manager.droplet_tag])["id"]
+
+        async def delete_twice():
+            first = await manager.delete_droplet(droplet_id)
+            second = await manager.delete_droplet(droplet_id, missing_ok=True)
+            return first, second
+
+        first, second = self._run(manager, delete_twice())
+
+        self.assertIn("deleted successfully", first["message"])
+        self.assertIn("already deleted", second["message"])
+        self.assertNotIn(droplet_id, fake.droplets)
+
+    def test_rate_limit_headers_and_429(self):
+        fake = FakeDigitalOcean(rate_limit=2)
+
+        async def call_three_times():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=fake.app),
+                base_url="http://fake-digitalocean/v2",
+                headers={"Authorization": "Bearer test-token"},
+            ) as client:
+                return [await client.get("/droplets") for _ in range(3)]
+
+        responses = asyncio.run(call_three_times())
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertEqual(responses[0].headers["RateLimit-Limit"], "2")
+        self.assertEqual(responses[1].headers["RateLimit-Remaining"], "0")
+        self.assertIn("Retry-After", responses[2].headers)
+
+    def test_client_holds_requests_once_budget_is_spent(self):
+        fake = FakeDigitalOcean(rate_limit=2)
+        manager = self._manager(fake, max_retries=0)
+
+        async def call_three_times():
+            # Player priority, so the reserve kept for players does not hold back the first two
+            for _ in range(2):
+                await manager.client.request("GET", "/droplets", priority=PRIORITY_PLAYER)
+            await asyncio.wait_for(manager.client.request("GET", "/droplets", priority=PRIORITY_PLAYER), timeout=0.2)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self._run(manager, call_three_times())
+        self.assertEqual(fake.request_count, 2)
+
+    def test_injected_errors_are_retried(self):
+        fake = FakeDigitalOcean(error_rate=1.0)
+        manager = self._manager(fake, max_retries=2, backoff_base=0)
+
+        with self.assertRaises(Exception):
+            self._run(manager, manager.list_tagged_droplets())
+        self.assertEqual(fake.request_count, 3)
+
+    def test_droplet_actions(self):
+        fake = FakeDigitalOcean()
+        manager = self._manager(fake)
+        droplet_id = fake.add_droplet()["id"]
+
+        async def power_off():
+            response = await manager.client.request(
+                "POST", f"/droplets/{droplet_id}/actions", json={"type": "power_off"}, idempotent=False,
+            )
+            action = response.json()["action"]
+            status = (await manager.client.request("GET", f"/actions/{action['id']}")).json()["action"]["status"]
+            return response.status_code, status
+
+        self.assertEqual(self._run(manager, power_off()), (201, "completed"))
+        self.assertEqual(fake.droplets[droplet_id]["status"], "off")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.heartbeat_buffer import HeartbeatBuffer
+
+
+class TestHeartbeatBuffer(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = MagicMock()
+        self.db_manager.update_or_insert_game_droplets.return_value = set()
+        self.buffer = HeartbeatBuffer(self.db_manager, flush_interval_ms=60_000)
+
+    def tearDown(self):
+        self.buffer.stop()
+
+    def _flushed_batches(self):
+        return [dict(call.args[0]) for call in self.db_manager.update_or_insert_game_droplets.call_args_list]
+
+    def test_disabled_buffer_writes_through(self):
+        buffer = HeartbeatBuffer(self.db_manager, flush_interval_ms=0)
+        self.db_manager.update_or_insert_game_droplet.return_value = True
+
+        buffer.start()
+
+        self.assertTrue(buffer.record("10.0.0.1", 0))
+        self.assertFalse(buffer.running)
+        self.db_manager.update_or_insert_game_droplet.assert_called_once_with("10.0.0.1", 0)
+
+    def test_heartbeats_are_coalesced_per_droplet(self):
+        self.buffer.start()
+
+        self.buffer.record("10.0.0.1", 0)
+        self.buffer.record("10.0.0.2", 0)
+        self.buffer.record("10.0.0.1", 0)
+        self.db_manager.update_or_insert_game_droplets.assert_not_called()
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self._flushed_batches(), [{"10.0.0.1": 0, "10.0.0.2": 0}])
+        self.db_manager.update_or_insert_game_droplet.assert_not_called()
+
+    def test_first_player_forces_immediate_flush(self):
+        self.buffer.start()
+        self.buffer.record("10.0.0.1", 0)
+        self.buffer.record("10.0.0.2", 0)
+
+        self.buffer.record("10.0.0.1", 1)
+
+        self.assertEqual(self._flushed_batches(), [{"10.0.0.1": 1, "10.0.0.2": 0}])
+
+    def test_player_count_changes_above_zero_are_buffered(self):
+        self.buffer.start()
+        self.buffer.record("10.0.0.1", 1)
+
+        self.buffer.record("10.0.0.1", 3)
+        self.buffer.record("10.0.0.1", 0)
+
+        self.assertEqual(self._flushed_batches(), [{"10.0.0.1": 1}])
+
+    def test_failed_flush_keeps_heartbeats_for_next_flush(self):
+        self.buffer.start()
+        self.db_manager.update_or_insert_game_droplets.side_effect = Exception("locked")
+        self.buffer.record("10.0.0.1", 0)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        self.db_manager.update_or_insert_game_droplets.side_effect = None
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_forget_drops_pending_heartbeat(self):
+        self.buffer.start()
+        self.buffer.record("10.0.0.1", 0)
+
+        self.buffer.forget("10.0.0.1")
+
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_write_batch_supersedes_buffered_heartbeats(self):
+        self.buffer.start()
+        self.buffer.record("10.0.0.1", 0)
+        self.db_manager.update_or_insert_game_droplets.return_value = {"10.0.0.2"}
+
+        created = self.buffer.write_batch({"10.0.0.1": 2, "10.0.0.2": 0})
+
+        self.assertEqual(created, {"10.0.0.2"})
+        self.assertEqual(self.buffer.flush(), 0)
+        self.buffer.record("10.0.0.1", 3)
+        self.assertEqual(self._flushed_batches(), [{"10.0.0.1": 2, "10.0.0.2": 0}])
+
+    def test_stop_flushes_pending_heartbeats(self):
+        self.buffer.start()
+        self.buffer.record("10.0.0.1", 0)
+
+        self.buffer.stop()
+
+        self.assertEqual(self._flushed_batches(), [{"10.0.0.1": 0}])
+
+
+if __name__ == "__main__":
+    unittest.main()
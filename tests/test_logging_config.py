@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import queue
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.logging_config import DroppingQueueHandler, JsonFormatter, RequestLogSampler, parse_sample_rates
+
+
+class TestLoggingConfig(unittest.TestCase):
+    def test_json_formatter_includes_extra_fields(self):
+        record = logging.makeLogRecord({
+            "name": "app.requests", "levelname": "INFO", "msg": "request",
+            "method": "POST", "path": "/server/heartbeat", "status": 200, "duration_ms": 1.25,
+        })
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry["message"], "request")
+        self.assertEqual(entry["logger"], "app.requests")
+        self.assertEqual(
+            {key: entry[key] for key in ("method", "path", "status", "duration_ms")},
+            {"method": "POST", "path": "/server/heartbeat", "status": 200, "duration_ms": 1.25},
+        )
+        self.assertNotIn("args", entry)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        logger = logging.getLogger("tests.logging_config.dropping")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            logger.warning("first")
+            logger.warning("second")
+        finally:
+            logger.removeHandler(handler)
+
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_parse_sample_rates(self):
+        self.assertEqual(
+            parse_sample_rates("/server/heartbeat=0.01, /sessions/start=1,bad,/x=7"),
+            {"/server/heartbeat": 0.01, "/sessions/start": 1.0, "/x": 1.0},
+        )
+
+    def test_sampler_applies_route_rates_and_keeps_errors(self):
+        sampler = RequestLogSampler({"/server/heartbeat": 0.0, "/sessions/start": 1.0}, default_rate=1.0)
+
+        self.assertFalse(sampler.should_log("/server/heartbeat", 200))
+        self.assertTrue(sampler.should_log("/server/heartbeat", 401))
+        self.assertTrue(sampler.should_log("/sessions/start", 200))
+        self.assertTrue(sampler.should_log("/", 200))
+
+    def test_sampler_rate_is_probabilistic(self):
+        sampler = RequestLogSampler({"/server/heartbeat": 0.01})
+
+        with patch("app.backend.logging_config.random.random", side_effect=[0.005, 0.5]):
+            self.assertTrue(sampler.should_log("/server/heartbeat", 200))
+            self.assertFalse(sampler.should_log("/server/heartbeat", 200))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.metrics import MetricsRegistry, timed
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = self.registry.histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        text = self.registry.render()
+
+        self.assertIn('test_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{route="/a",le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{route="/a",le="+Inf"} 3', text)
+        self.assertIn('test_seconds_sum{route="/a"} 5.55', text)
+        self.assertIn('test_seconds_count{route="/a"} 3', text)
+        self.assertIn("# TYPE test_seconds histogram", text)
+
+    def test_counter_and_callback_gauge(self):
+        counter = self.registry.counter("test_total", "Things.")
+        self.registry.callback_gauge("test_items", "Items by state.", "state", lambda: {"b": 2, "a": 1})
+        counter.inc()
+        counter.inc(amount=2)
+
+        text = self.registry.render()
+
+        self.assertIn("test_total 3", text)
+        self.assertIn('test_items{state="a"} 1\ntest_items{state="b"} 2', text)
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter("test_total", "Things.", ("path",))
+        counter.inc('a"b\\c')
+
+        self.assertIn('test_total{path="a\\"b\\\\c"} 1', self.registry.render())
+
+    def test_failing_callback_does_not_break_scrape(self):
+        def broken():
+            raise RuntimeError("db down")
+
+        self.registry.callback_gauge("test_items", "Items.", "state", broken)
+        self.registry.counter("test_total", "Things.")
+
+        text = self.registry.render()
+
+        self.assertIn("# test_items unavailable: db down", text)
+        self.assertIn("test_total 0", text)
+
+    def test_timed_records_sync_and_async_calls(self):
+        histogram = self.registry.histogram("test_seconds", "Test latency.", ("operation",))
+
+        @timed(histogram, "sync")
+        def sync_call():
+            return 1
+
+        @timed(histogram, "async")
+        async def async_call():
+            raise ValueError("failed calls are timed too")
+
+        self.assertEqual(sync_call(), 1)
+        with self.assertRaises(ValueError):
+            asyncio.run(async_call())
+
+        self.assertEqual(histogram.count("sync"), 1)
+        self.assertEqual(histogram.count("async"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.database_manager import _FREE_DROPLET_FILTER
+from app.db.migrations import MIGRATIONS, migrate, schema_version
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+        self.db_path = temp_db.name
+        temp_db.close()
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.db_path)
+
+    def _query_plan(self, sql, params=()):
+        return " | ".join(row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+    def test_migrate_applies_all_and_records_version(self):
+        applied = migrate(self.conn)
+
+        self.assertEqual(applied, [version for version, _, _ in MIGRATIONS])
+        self.assertEqual(schema_version(self.conn), MIGRATIONS[-1][0])
+        self.assertEqual(migrate(self.conn), [])
+
+    def test_migrate_upgrades_database_from_original_setup_script(self):
+        self.conn.execute(
+            """
+            CREATE TABLE game_droplets (
+                ipv4 TEXT PRIMARY KEY,
+                connected_clients INTEGER NOT NULL DEFAULT 0,
+                fresh_game INTEGER GENERATED ALWAYS AS (CASE WHEN connected_clients <= 0 THEN 1 ELSE 0 END) STORED,
+                last_heartbeat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                droplet_id INT NOT NULL DEFAULT 0,
+                share_tag TEXT UNIQUE
+            )
+            """
+        )
+        self.conn.execute("INSERT INTO game_droplets (ipv4, share_tag) VALUES ('10.0.0.1', 'OLD001')")
+        self.conn.commit()
+
+        migrate(self.conn)
+
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(game_droplets)")}
+        self.assertTrue({"reserved_until", "healthy"} <= columns)
+        self.assertEqual(
+            self.conn.execute("SELECT share_tag, healthy FROM game_droplets").fetchall(),
+            [("OLD001", 1)],
+        )
+
+    def test_failed_migration_is_rolled_back(self):
+        def broken(cur):
+            cur.execute("CREATE TABLE half_done (x INTEGER)")
+            raise RuntimeError("boom")
+
+        migrate(self.conn)
+        MIGRATIONS.append((MIGRATIONS[-1][0] + 1, "broken", broken))
+        try:
+            with self.assertRaises(RuntimeError):
+                migrate(self.conn)
+        finally:
+            MIGRATIONS.pop()
+
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertNotIn("half_done", tables)
+        self.assertEqual(schema_version(self.conn), MIGRATIONS[-1][0])
+
+    def test_free_droplet_query_uses_partial_index(self):
+        migrate(self.conn)
+
+        plan = self._query_plan("SELECT ipv4, share_tag FROM game_droplets" + _FREE_DROPLET_FILTER)
+
+        self.assertEqual(plan, "SCAN game_droplets USING INDEX idx_game_droplets_free")
+
+    def test_claim_query_uses_partial_index(self):
+        migrate(self.conn)
+
+        plan = self._query_plan(
+            "UPDATE game_droplets SET reserved_until = CURRENT_TIMESTAMP WHERE ipv4 = ("
+            "SELECT ipv4 FROM game_droplets" + _FREE_DROPLET_FILTER + ")"
+        )
+
+        self.assertIn("USING INDEX idx_game_droplets_free", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_stale_heartbeat_query_uses_index(self):
+        migrate(self.conn)
+
+        plan = self._query_plan(
+            "SELECT ipv4 FROM game_droplets WHERE healthy = 1 AND last_heartbeat < datetime('now', ?)",
+            ("-300 seconds",),
+        )
+
+        self.assertIn("USING INDEX idx_game_droplets_heartbeat_age (last_heartbeat<?)", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
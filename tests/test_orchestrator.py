@@ -7,6 +7,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.backend.database_manager import DBManager
+from app.db.migrations import migrate
 
 
 class TestDatabaseFlow(unittest.TestCase):
@@ -16,40 +17,16 @@ class TestDatabaseFlow(unittest.TestCase):
         self.temp_db.close()
 
         conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS game_droplets (
-                ipv4 TEXT PRIMARY KEY,
-                connected_clients INTEGER NOT NULL DEFAULT 0,
-                fresh_game INTEGER GENERATED ALWAYS AS (CASE WHEN connected_clients <= 0 THEN 1 ELSE 0 END) STORED,
-                last_heartbeat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                droplet_id INT NOT NULL DEFAULT 0,
-                share_tag TEXT UNIQUE
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS set_share_tag_after_insert
-            AFTER INSERT ON game_droplets
-            FOR EACH ROW
-            WHEN NEW.share_tag IS NULL
-            BEGIN
-                UPDATE game_droplets
-                SET share_tag = substr(hex(randomblob(3)), 1, 6)
-                WHERE rowid = NEW.rowid;
-            END;
-            """
-        )
-        conn.commit()
+        migrate(conn)
         conn.close()
 
         self.db_manager = DBManager(self.db_path)
 
     def tearDown(self):
-        if os.path.exists(self.db_path):
-            os.unlink(self.db_path)
+        self.db_manager.close()
+        for path in (self.db_path, f"{self.db_path}-wal", f"{self.db_path}-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
 
     def test_reuse_then_remove_session_flow(self):
         self.db_manager.update_or_insert_game_droplet("10.0.9.1", 0)
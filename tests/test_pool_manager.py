@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.pool_manager import PoolManager
+
+
+class TestPoolManager(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = MagicMock()
+        self.droplet_manager = MagicMock()
+        self.droplet_manager.create_droplet = AsyncMock(return_value="10.0.0.1")
+
+    def _pool(self, **kwargs):
+        options = {"min_idle": 3, "max_size": 10, "refill_concurrency": 2, "check_interval": 60}
+        options.update(kwargs)
+        return PoolManager(self.db_manager, self.droplet_manager, snapshot_id="snap", **options)
+
+    def test_disabled_pool_does_not_start(self):
+        pool = self._pool(min_idle=0)
+
+        async def run():
+            pool.start()
+            return pool.running
+
+        self.assertFalse(asyncio.run(run()))
+
+    def test_refill_deficit_is_bounded_by_concurrency(self):
+        self.db_manager.get_pool_counts.return_value = (0, 0)
+
+        self.assertEqual(self._pool().refill_deficit(), 2)
+
+    def test_refill_deficit_is_bounded_by_max_size(self):
+        self.db_manager.get_pool_counts.return_value = (0, 9)
+
+        self.assertEqual(self._pool().refill_deficit(), 1)
+
+    def test_refill_deficit_is_zero_when_pool_is_full(self):
+        self.db_manager.get_pool_counts.return_value = (3, 5)
+
+        self.assertEqual(self._pool().refill_deficit(), 0)
+
+    def test_refill_creates_missing_droplets(self):
+        self.db_manager.get_pool_counts.return_value = (2, 4)
+        pool = self._pool()
+
+        async def run():
+            started = pool.refill()
+            await asyncio.gather(*pool._creations)
+            return started
+
+        self.assertEqual(asyncio.run(run()), 1)
+        self.droplet_manager.create_droplet.assert_awaited_once()
+        self.assertEqual(pool._in_flight, 0)
+
+    def test_in_flight_creations_count_towards_idle_target(self):
+        self.db_manager.get_pool_counts.return_value = (1, 1)
+        pool = self._pool(refill_concurrency=5)
+        pool._in_flight = 2
+
+        self.assertEqual(pool.refill_deficit(), 0)
+
+    def test_failed_creation_releases_slot(self):
+        self.db_manager.get_pool_counts.return_value = (0, 0)
+        self.droplet_manager.create_droplet = AsyncMock(side_effect=Exception("boom"))
+        pool = self._pool(min_idle=1)
+
+        async def run():
+            pool.refill()
+            await asyncio.gather(*pool._creations)
+
+        asyncio.run(run())
+        self.assertEqual(pool._in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+import unittest
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.digitalocean_client import DigitalOceanClient
+from app.backend.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_PLAYER, RateLimitScheduler
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.wall = 1_000_000.0
+        # 10 tokens, refilling at one per second, half of them reserved for players
+        self.scheduler = RateLimitScheduler(
+            limit=10, window=10, reserve=0.5, clock=lambda: self.now, wall_clock=lambda: self.wall,
+        )
+
+    def test_background_requests_stop_at_the_reserve(self):
+        waits = [self.scheduler._try_acquire(PRIORITY_BACKGROUND) for _ in range(6)]
+
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertAlmostEqual(waits[5], 1.0)
+        self.assertEqual(self.scheduler._try_acquire(PRIORITY_PLAYER), 0.0)
+
+    def test_player_requests_may_spend_the_whole_bucket(self):
+        waits = [self.scheduler._try_acquire(PRIORITY_PLAYER) for _ in range(11)]
+
+        self.assertEqual(waits[:10], [0.0] * 10)
+        self.assertAlmostEqual(waits[10], 1.0)
+
+    def test_bucket_refills_over_time(self):
+        for _ in range(10):
+            self.scheduler._try_acquire(PRIORITY_PLAYER)
+
+        self.now += 3
+
+        self.assertEqual(self.scheduler._try_acquire(PRIORITY_PLAYER), 0.0)
+        self.assertAlmostEqual(self.scheduler.tokens, 2.0)
+
+    def test_remaining_header_resyncs_tokens_less_requests_in_flight(self):
+        self.scheduler._try_acquire(PRIORITY_BACKGROUND)
+        self.scheduler._try_acquire(PRIORITY_BACKGROUND)
+
+        self.scheduler.release(200, {"RateLimit-Limit": "10", "RateLimit-Remaining": "4"})
+
+        self.assertEqual(self.scheduler.in_flight, 1)
+        self.assertEqual(self.scheduler.tokens, 3.0)
+
+    def test_exhausted_budget_holds_requests_until_reset(self):
+        self.scheduler._try_acquire(PRIORITY_PLAYER)
+
+        self.scheduler.release(200, {"RateLimit-Remaining": "0", "RateLimit-Reset": str(int(self.wall) + 30)})
+
+        self.assertAlmostEqual(self.scheduler._try_acquire(PRIORITY_PLAYER), 30.0)
+        self.now += 30
+        self.assertEqual(self.scheduler._try_acquire(PRIORITY_PLAYER), 0.0)
+
+    def test_retry_after_on_429_takes_precedence_over_reset(self):
+        self.scheduler._try_acquire(PRIORITY_PLAYER)
+
+        self.scheduler.release(429, {"Retry-After": "5", "RateLimit-Reset": str(int(self.wall) + 600)})
+
+        self.assertAlmostEqual(self.scheduler._try_acquire(PRIORITY_PLAYER), 5.0)
+
+    def test_bucket_is_full_again_once_the_block_ends(self):
+        self.scheduler._try_acquire(PRIORITY_BACKGROUND)
+        self.scheduler.release(429, {"Retry-After": "5"})
+
+        self.now += 5
+
+        self.assertEqual(self.scheduler._try_acquire(PRIORITY_BACKGROUND), 0.0)
+        self.assertEqual(self.scheduler.tokens, 9.0)
+
+    def test_429_without_timing_headers_does_not_hold_background_requests(self):
+        self.scheduler._try_acquire(PRIORITY_BACKGROUND)
+
+        self.scheduler.release(429, {})
+
+        self.assertEqual(self.scheduler._try_acquire(PRIORITY_BACKGROUND), 0.0)
+
+    def test_queued_player_request_goes_before_waiting_background_request(self):
+        scheduler = RateLimitScheduler(limit=2, window=0.2, reserve=0)
+        scheduler.tokens = 0.0
+        order = []
+
+        async def request(priority, name):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        async def run():
+            background = asyncio.create_task(request(PRIORITY_BACKGROUND, "background"))
+            await asyncio.sleep(0)
+            await asyncio.gather(background, request(PRIORITY_PLAYER, "player"))
+
+        asyncio.run(run())
+
+        self.assertEqual(order, ["player", "background"])
+
+
+class TestDigitalOceanClientRateLimit(unittest.TestCase):
+    def test_every_attempt_is_accounted_and_headers_are_applied(self):
+        responses = [
+            httpx.ConnectError("refused"),
+            httpx.Response(200, json={}, headers={"RateLimit-Limit": "5000", "RateLimit-Remaining": "4321"}),
+        ]
+
+        def handler(request):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        scheduler = RateLimitScheduler(limit=5000, window=3600, reserve=0.2)
+        client = DigitalOceanClient(
+            "test-token", transport=httpx.MockTransport(handler), backoff_base=0, rate_limiter=scheduler,
+        )
+
+        async def run():
+            try:
+                return await client.request("GET", "/droplets", priority=PRIORITY_PLAYER)
+            finally:
+                await client.aclose()
+
+        response = asyncio.run(run())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(scheduler.in_flight, 0)
+        self.assertEqual(scheduler.tokens, 4321.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
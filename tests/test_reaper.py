@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.reaper import StaleDropletReaper
+
+
+class TestStaleDropletReaper(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = MagicMock()
+        self.db_manager.mark_stale_droplets.return_value = 2
+        self.db_manager.get_unhealthy_droplets.return_value = [("10.0.0.1", 101), ("10.0.0.2", 102)]
+        self.droplet_manager = MagicMock()
+        self.droplet_manager.delete_droplet = AsyncMock()
+
+    def _reaper(self, **kwargs):
+        options = {"interval": 60, "stale_after": 300, "delete_concurrency": 2}
+        options.update(kwargs)
+        return StaleDropletReaper(self.db_manager, self.droplet_manager, **options)
+
+    def test_sweep_deletes_unhealthy_droplets(self):
+        reaper = self._reaper()
+
+        result = asyncio.run(reaper.sweep())
+
+        self.assertEqual(result, (2, 2, 0))
+        self.db_manager.mark_stale_droplets.assert_called_once_with(300)
+        self.droplet_manager.delete_droplet.assert_any_await(101, missing_ok=True)
+        self.droplet_manager.delete_droplet.assert_any_await(102, missing_ok=True)
+        self.db_manager.remove_droplet_from_db.assert_any_call("10.0.0.1")
+        self.db_manager.remove_droplet_from_db.assert_any_call("10.0.0.2")
+        self.assertEqual(reaper.metrics["deleted"], 2)
+        self.assertEqual(reaper.metrics["sweeps"], 1)
+
+    def test_failed_delete_keeps_row_for_next_sweep(self):
+        self.droplet_manager.delete_droplet = AsyncMock(side_effect=[None, Exception("DO unavailable")])
+        reaper = self._reaper()
+
+        result = asyncio.run(reaper.sweep())
+
+        self.assertEqual(result, (2, 1, 1))
+        self.db_manager.remove_droplet_from_db.assert_called_once_with("10.0.0.1")
+        self.assertEqual(reaper.metrics["delete_failures"], 1)
+
+    def test_rows_without_droplet_id_are_only_removed_from_db(self):
+        self.db_manager.get_unhealthy_droplets.return_value = [("127.0.0.1", 0)]
+
+        asyncio.run(self._reaper().sweep())
+
+        self.droplet_manager.delete_droplet.assert_not_awaited()
+        self.db_manager.remove_droplet_from_db.assert_called_once_with("127.0.0.1")
+
+    def test_deletes_are_bounded_by_concurrency(self):
+        self.db_manager.get_unhealthy_droplets.return_value = [(f"10.0.1.{i}", 200 + i) for i in range(10)]
+        active = 0
+        peak = 0
+
+        async def delete(droplet_id, missing_ok=False):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0)
+            active -= 1
+
+        self.droplet_manager.delete_droplet = delete
+
+        asyncio.run(self._reaper(delete_concurrency=3).sweep())
+
+        self.assertEqual(peak, 3)
+        self.assertEqual(self.db_manager.remove_droplet_from_db.call_count, 10)
+
+    def test_disabled_reaper_does_not_start(self):
+        reaper = self._reaper(interval=0)
+
+        async def run():
+            reaper.start()
+            return reaper.running
+
+        self.assertFalse(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    unittest.main()
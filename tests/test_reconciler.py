@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.reconciler import DropletReconciler
+
+
+class TestDropletReconciler(unittest.TestCase):
+    def setUp(self):
+        self.droplet_manager = MagicMock()
+
+    def test_reconcile_accumulates_metrics(self):
+        async def reconcile():
+            return {"inserted": 1, "updated": 2, "deleted": 3}
+
+        self.droplet_manager.reconcile = reconcile
+        reconciler = DropletReconciler(self.droplet_manager, interval=60)
+
+        asyncio.run(reconciler.reconcile())
+        counts = asyncio.run(reconciler.reconcile())
+
+        self.assertEqual(counts, {"inserted": 1, "updated": 2, "deleted": 3})
+        self.assertEqual(reconciler.metrics["runs"], 2)
+        self.assertEqual(reconciler.metrics["deleted"], 6)
+
+    def test_concurrent_runs_are_serialized(self):
+        active = 0
+        peak = 0
+
+        async def reconcile():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0)
+            active -= 1
+            return {"inserted": 0, "updated": 0, "deleted": 0}
+
+        self.droplet_manager.reconcile = reconcile
+        reconciler = DropletReconciler(self.droplet_manager, interval=60)
+
+        async def run():
+            await asyncio.gather(*(reconciler.reconcile() for _ in range(3)))
+
+        asyncio.run(run())
+
+        self.assertEqual(peak, 1)
+        self.assertEqual(reconciler.metrics["runs"], 3)
+
+    def test_failed_run_is_counted_and_raised(self):
+        async def reconcile():
+            raise Exception("DO unavailable")
+
+        self.droplet_manager.reconcile = reconcile
+        reconciler = DropletReconciler(self.droplet_manager, interval=60)
+
+        with self.assertRaises(Exception):
+            asyncio.run(reconciler.reconcile())
+        self.assertEqual(reconciler.metrics["failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
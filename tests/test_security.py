@@ -7,12 +7,12 @@ import time
 import unittest
 from unittest.mock import patch
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.testclient import TestClient
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.backend.security import require_internal_hmac
+from app.backend.security import HmacVerifier, _build_verifier, require_internal_hmac
 
 
 def _sign_headers(secret: str, method: str, path: str, query: str = "", body: bytes = b"", timestamp: int | None = None):
@@ -30,6 +30,7 @@ def _sign_headers(secret: str, method: str, path: str, query: str = "", body: by
 class TestSecurity(unittest.TestCase):
     def setUp(self):
         self.secret = "test-hmac-secret"
+        _build_verifier.cache_clear()
         self.app = FastAPI()
 
         @self.app.post("/protected")
@@ -96,6 +97,53 @@ class TestSecurity(unittest.TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertEqual(response.json(), {"detail": "Stale HMAC signature."})
 
+    def test_replayed_signature_returns_401(self):
+        headers = _sign_headers(self.secret, "POST", "/protected")
+
+        with patch.dict(os.environ, {"INTERNAL_HMAC_KEY": self.secret}, clear=False):
+            first = self.client.post("/protected", headers=headers)
+            replay = self.client.post("/protected", headers=headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replay.status_code, 401)
+        self.assertEqual(replay.json(), {"detail": "Replayed HMAC signature."})
+
+    def test_replay_check_can_be_disabled(self):
+        headers = _sign_headers(self.secret, "POST", "/protected")
+        env = {"INTERNAL_HMAC_KEY": self.secret, "INTERNAL_HMAC_REPLAY_CACHE_SIZE": "0"}
+
+        with patch.dict(os.environ, env, clear=False):
+            first = self.client.post("/protected", headers=headers)
+            replay = self.client.post("/protected", headers=headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replay.status_code, 200)
+
+
+class TestHmacVerifier(unittest.TestCase):
+    def _verify(self, verifier, timestamp, now, path="/protected"):
+        signature = _sign_headers("secret", "POST", path, timestamp=timestamp)["Request-Signature"]
+        verifier.verify("POST", path, "", str(timestamp), signature, b"", now=now)
+
+    def test_replay_cache_expires_with_skew_window(self):
+        verifier = HmacVerifier("secret", max_skew_seconds=300, replay_cache_size=10)
+
+        self._verify(verifier, 1000, now=1000)
+        self.assertEqual(len(verifier._seen), 1)
+        self._verify(verifier, 1400, now=1400)
+
+        self.assertEqual(list(verifier._seen.values()), [1700])
+
+    def test_replay_cache_is_bounded(self):
+        verifier = HmacVerifier("secret", max_skew_seconds=300, replay_cache_size=3)
+
+        for i in range(5):
+            self._verify(verifier, 1000, now=1000, path=f"/protected/{i}")
+
+        self.assertEqual(len(verifier._seen), 3)
+        with self.assertRaises(HTTPException):
+            self._verify(verifier, 1000, now=1000, path="/protected/4")
+
 
 if __name__ == "__main__":
     unittest.main()
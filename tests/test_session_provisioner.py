@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.backend.session_provisioner import SessionProvisioner
+
+
+class TestSessionProvisioner(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = MagicMock()
+        self.db_manager.create_provisioning_session.return_value = "TAG001"
+        self.droplet_manager = MagicMock()
+        self.droplet_manager.request_droplet = AsyncMock(return_value=501)
+        self.droplet_manager.wait_until_active = AsyncMock(
+            return_value={"id": 501, "status": "active", "networks": {"v4": [{"ip_address": "10.0.5.1", "type": "public"}]}}
+        )
+        self.droplet_manager.discard_droplet = AsyncMock()
+        self.provisioner = SessionProvisioner(self.db_manager, self.droplet_manager)
+
+    def _start_and_wait(self):
+        async def run():
+            share_tag = self.provisioner.start_session()
+            await asyncio.gather(*self.provisioner._tasks)
+            return share_tag
+
+        return asyncio.run(run())
+
+    def test_start_session_returns_share_tag_and_assigns_droplet(self):
+        share_tag = self._start_and_wait()
+
+        self.assertEqual(share_tag, "TAG001")
+        self.db_manager.update_provisioning_session.assert_called_once_with("TAG001", "provisioning", droplet_id=501)
+        self.db_manager.assign_droplet_to_session.assert_called_once_with("TAG001", "10.0.5.1", 501)
+        self.droplet_manager.discard_droplet.assert_not_awaited()
+
+    def test_failed_provisioning_marks_session_and_discards_droplet(self):
+        self.droplet_manager.wait_until_active = AsyncMock(side_effect=TimeoutError("too slow"))
+
+        self._start_and_wait()
+
+        self.db_manager.update_provisioning_session.assert_called_with("TAG001", "failed", error="too slow")
+        self.droplet_manager.discard_droplet.assert_awaited_once_with(501)
+        self.db_manager.assign_droplet_to_session.assert_not_called()
+
+    def test_failed_create_request_does_not_discard(self):
+        self.droplet_manager.request_droplet = AsyncMock(side_effect=Exception("quota"))
+
+        self._start_and_wait()
+
+        self.db_manager.update_provisioning_session.assert_called_once_with("TAG001", "failed", error="quota")
+        self.droplet_manager.discard_droplet.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()